@@ -0,0 +1,60 @@
+from docker_client import get_docker
+
+
+class C2Session(object):
+    """Batches C2 menu probes into a single run of the C2 binary.
+
+    The binary does not echo its input, so every command's output is the
+    text between two consecutive ``C2> `` prompts. Probes are queued with
+    ``add()`` and piped through one exec by ``run()``.
+    """
+    prompt = 'C2> '
+
+    def __init__(self, container='c2_container', binary='/usr/local/bin/tni_c2_system', timeout=15, docker=None):
+        self.container = container
+        self.docker = docker or get_docker()
+        self.binary = binary
+        self.timeout = timeout
+        self.probes = []
+        self.stdout = ''
+
+    def add(self, name, *lines):
+        # A probe is a menu command plus the lines its sub-prompts read.
+        self.probes.append((name, list(lines)))
+        return self
+
+    def run(self):
+        lines = [line for _, probe_lines in self.probes for line in probe_lines]
+        lines.append('exit')
+        self.stdout = self._exec(
+            ['timeout', str(self.timeout), self.binary],
+            ''.join(line + '\n' for line in lines),
+            self.timeout + 2,
+        )
+
+        segments = self.stdout.split(self.prompt)
+        outputs = {'banner': segments[0]}
+        for index, (name, _) in enumerate(self.probes):
+            segment = index + 1
+            outputs[name] = segments[segment] if segment < len(segments) else ''
+        return outputs
+
+    def inspect(self, flag_path, paths):
+        """Reads the flag and tests for ``paths`` in one exec.
+
+        Returns ``(flag, {path: exists})``.
+        """
+        script = ''.join(f'test -f {path}; echo $?; ' for path in paths)
+        script += f'cat {flag_path}'
+        stdout = self._exec(['sh', '-c', script], None, 10)
+
+        lines = stdout.split('\n', len(paths))
+        exists = {path: lines[i].strip() == '0' for i, path in enumerate(paths) if i < len(lines)}
+        flag = lines[len(paths)] if len(lines) > len(paths) else ''
+        return flag.strip(), exists
+
+    def _exec(self, command, input_str, timeout):
+        try:
+            return self.docker.exec_run(self.container, command, stdin=input_str, timeout=timeout).stdout
+        except TimeoutError:
+            return ''
@@ -3,11 +3,14 @@ import random
 import string
 
 from config import get_settings
+from docker_client import get_docker
 
 
 class Challenge(object):
     name = __name__
     settings = get_settings()
+    docker = get_docker()
+    container = None
     port = 0
 
     def __init__(self, port):    
@@ -21,6 +24,9 @@ class Challenge(object):
         charset = string.ascii_uppercase + string.ascii_lowercase + string.digits
         return ''.join(random.choice(charset) for i in range(length))
 
+    def container_exec(self, cmd, stdin=None, timeout=30):
+        return self.docker.exec_run(self.container, cmd, stdin=stdin, timeout=timeout)
+
     def distribute(self, flag):
         raise NotImplementedError
 
@@ -3,9 +3,9 @@
 from .Challenge import Challenge
 import requests
 import os
-import subprocess
 
 class LFS(Challenge):
+    container = 'lfs_container'
     flag_location = 'flags/lfs.txt'
     history_location = 'history/lfs.txt'
 
@@ -102,10 +102,7 @@ class LFS(Challenge):
             # Step 4: flag check
             with open(self.flag_location, 'r') as f:
                 host_flag = f.read().strip()
-            container_flag = subprocess.run(
-                ["docker", "exec", "lfs_container", "cat", "/flag.txt"],
-                capture_output=True, text=True
-            ).stdout.strip()
+            container_flag = self.container_exec(["cat", "/flag.txt"]).stdout.strip()
             assert host_flag == container_flag, "Flag mismatch"
 
             self.logger.info("LFS check passed successfully!")
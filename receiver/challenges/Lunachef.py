@@ -2,12 +2,12 @@ from .Challenge import Challenge
 
 import requests
 import time
-import subprocess
 import html
 import types
 import sys
 
 class Lunachef(Challenge):
+    container = 'lunachef_container'
     flag_location = 'flags/lunachef.txt'
     history_location = 'history/lunachef.txt'
 
@@ -35,11 +35,7 @@ class Lunachef(Challenge):
             with open(self.flag_location, 'r') as f:
                 host_flag = f.read().strip()
 
-            container_flag = subprocess.run(
-                ["docker", "exec", "lunachef_container", "cat", "/flag.txt"],
-                capture_output=True,
-                text=True
-            ).stdout.strip()
+            container_flag = self.container_exec(["cat", "/flag.txt"]).stdout.strip()
             
             assert host_flag == container_flag, 'Flag mismatch between host and container'
             
@@ -54,19 +50,11 @@ class Lunachef(Challenge):
             # Step 2: Check if the flag still exists and matches the one in the container
             with open(self.flag_location, 'r') as f:
                 host_flag = f.read().strip()
-            container_flag = subprocess.run(
-                ["docker", "exec", "lunachef_container", "cat", "/flag.txt"],
-                capture_output=True,
-                text=True
-            ).stdout.strip()
+            container_flag = self.container_exec(["cat", "/flag.txt"]).stdout.strip()
             assert host_flag == container_flag, 'Flag mismatch between host and container'
             
             # Step 3: get key from container
-            container_key = subprocess.run(
-                ["docker", "exec", "lunachef_container", "cat", "/app/config/__init__.py"],
-                capture_output=True,
-                text=True
-            ).stdout.strip()
+            container_key = self.container_exec(["cat", "/app/config/__init__.py"]).stdout.strip()
             assert container_key, 'Key not found in container config.py'
             scope = {
                 'FLAG': container_flag.encode()
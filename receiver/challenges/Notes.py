@@ -1,9 +1,9 @@
 from .Challenge import Challenge
 import requests
 import secrets
-import subprocess
 
 class Notes(Challenge):
+    container = 'notes_container'
     flag_location = 'flags/notes.txt'
     history_location = 'history/notes.txt'
 
@@ -159,19 +159,14 @@ class Notes(Challenge):
             with open(self.flag_location, 'r') as f:
                 host_flag = f.read().strip()
 
-            container_flag = subprocess.run(
-                ["docker", "exec", "notes_container", "cat", "/flag.txt"],
-                capture_output=True,
-                text=True,
-                timeout=10
-            ).stdout.strip()
+            container_flag = self.container_exec(["cat", "/flag.txt"], timeout=10).stdout.strip()
             
             assert host_flag == container_flag, 'Flag mismatch between host and container'
             
             self.logger.info('Check passed for notes')
             return True
 
-        except subprocess.TimeoutExpired:
+        except TimeoutError:
             self.logger.warning('Flag check timeout - container may be slow')
             # Don't fail completely on timeout, just warn
             self.logger.info('Check completed for notes (with warnings)')
@@ -26,6 +26,8 @@ class Settings(BaseSettings):
     PASSWORD_27000: str
     PASSWORD_28000: str
     PASSWORD_29000: str
+    CHECK_TIMEOUT: int = 60
+    DOCKER_SOCKET: str = '/var/run/docker.sock'
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,218 @@
+import http.client
+import json
+import queue
+import select
+import socket
+import time
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import quote, urlencode
+
+from config import get_settings
+
+
+ExecResult = namedtuple('ExecResult', ['returncode', 'stdout', 'stderr'])
+
+
+class DockerError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f'{status}: {message}')
+        self.status = status
+        self.message = message
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerClient(object):
+    """Minimal Docker Engine API client over the daemon's Unix socket.
+
+    Keep-alive connections are pooled, so a probe costs a couple of
+    round trips on an open socket instead of a ``docker`` CLI startup.
+    Pooled connections the daemon has closed are dropped before use, and
+    only GETs are retried if a pooled connection fails mid-request.
+    Exec output is attached on a dedicated socket because the daemon
+    hijacks that connection for the raw stream.
+    """
+    api_version = 'v1.41'
+
+    def __init__(self, socket_path='/var/run/docker.sock', pool_size=8, timeout=30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(pool_size)
+
+    def exec_run(self, container, cmd, stdin=None, timeout=None):
+        """Runs ``cmd`` in ``container`` like ``docker exec -i``.
+
+        ``stdin`` is written then closed. Returns an ``ExecResult`` with
+        decoded stdout and stderr. Raises ``TimeoutError`` if the command
+        outlives ``timeout`` seconds.
+        """
+        exec_id = self._json('POST', f'/containers/{quote(container)}/exec', {
+            'AttachStdin': stdin is not None,
+            'AttachStdout': True,
+            'AttachStderr': True,
+            'Tty': False,
+            'Cmd': cmd,
+        })['Id']
+        stdout, stderr = self._exec_start(exec_id, stdin, timeout or self.timeout)
+        returncode = self._json('GET', f'/exec/{exec_id}/json')['ExitCode']
+        return ExecResult(
+            returncode,
+            stdout.decode('utf-8', 'replace'),
+            stderr.decode('utf-8', 'replace'),
+        )
+
+    def restart(self, container, timeout=10):
+        self._json('POST', f'/containers/{quote(container)}/restart', params={'t': timeout}, timeout=timeout + self.timeout)
+
+    def _json(self, method, path, body=None, params=None, timeout=None):
+        status, data = self._request(method, path, body, params, timeout)
+        if status >= 400:
+            try:
+                message = json.loads(data)['message']
+            except (ValueError, KeyError, TypeError):
+                message = data.decode('utf-8', 'replace')
+            raise DockerError(status, message)
+        return json.loads(data) if data else None
+
+    def _request(self, method, path, body=None, params=None, timeout=None):
+        url = f'/{self.api_version}{path}'
+        if params:
+            url += '?' + urlencode(params)
+        headers = {'Host': 'docker'}
+        if body is not None:
+            body = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        conn, reused = self._acquire()
+        try:
+            status, data = self._roundtrip(conn, method, url, body, headers, timeout)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            # The daemon may already have acted on the request, so only a
+            # GET is safe to send again
+            if not reused or method != 'GET':
+                raise
+            conn = UnixHTTPConnection(self.socket_path, self.timeout)
+            try:
+                status, data = self._roundtrip(conn, method, url, body, headers, timeout)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                raise
+        self._release(conn)
+        return status, data
+
+    def _roundtrip(self, conn, method, url, body, headers, timeout):
+        conn.timeout = timeout or self.timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(conn.timeout)
+        conn.request(method, url, body=body, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read()
+
+    def _acquire(self):
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                return UnixHTTPConnection(self.socket_path, self.timeout), False
+            if not self._dropped(conn):
+                return conn, True
+            conn.close()
+
+    @staticmethod
+    def _dropped(conn):
+        # An idle keep-alive socket has nothing to read; if it is readable
+        # the daemon has closed it
+        if conn.sock is None:
+            return False
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+        return bool(readable)
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _exec_start(self, exec_id, stdin, timeout):
+        deadline = time.monotonic() + timeout
+        body = json.dumps({'Detach': False, 'Tty': False}).encode()
+        request = (
+            f'POST /{self.api_version}/exec/{exec_id}/start HTTP/1.1\r\n'
+            'Host: docker\r\n'
+            'Content-Type: application/json\r\n'
+            'Connection: Upgrade\r\n'
+            'Upgrade: tcp\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            '\r\n'
+        ).encode() + body
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(timeout)
+            sock.connect(self.socket_path)
+            sock.sendall(request)
+
+            buffer = b''
+            while b'\r\n\r\n' not in buffer:
+                chunk = self._recv(sock, deadline)
+                if not chunk:
+                    raise DockerError(502, 'Connection closed before exec response')
+                buffer += chunk
+            head, rest = buffer.split(b'\r\n\r\n', 1)
+            status = int(head.split(b' ', 2)[1])
+            if status not in (101, 200):
+                raise DockerError(status, head.decode('utf-8', 'replace'))
+
+            if stdin is not None:
+                sock.sendall(stdin.encode() if isinstance(stdin, str) else stdin)
+                sock.shutdown(socket.SHUT_WR)
+
+            frames = bytearray(rest)
+            while True:
+                chunk = self._recv(sock, deadline)
+                if not chunk:
+                    break
+                frames += chunk
+        finally:
+            sock.close()
+
+        return self._demux(frames)
+
+    def _recv(self, sock, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError('Exec timed out')
+        sock.settimeout(remaining)
+        try:
+            return sock.recv(65536)
+        except socket.timeout:
+            raise TimeoutError('Exec timed out')
+
+    @staticmethod
+    def _demux(buffer):
+        # Non-TTY exec output is framed: stream id, 3 pad bytes, u32 length
+        streams = {1: [], 2: []}
+        offset = 0
+        while offset + 8 <= len(buffer):
+            stream = buffer[offset]
+            size = int.from_bytes(buffer[offset + 4:offset + 8], 'big')
+            streams.setdefault(stream, []).append(buffer[offset + 8:offset + 8 + size])
+            offset += 8 + size
+        return b''.join(streams[1]), b''.join(streams[2])
+
+
+@lru_cache()
+def get_docker():
+    return DockerClient(get_settings().DOCKER_SOCKET)
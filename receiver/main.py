@@ -2,13 +2,16 @@ from fastapi import Depends, FastAPI, HTTPException
 from pydantic import BaseModel
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from config import get_settings
+from docker_client import DockerError, get_docker
 
 from challenges.C2 import C2
 from challenges.Notes import Notes
 from challenges.Lfs import LFS
 from challenges.Lunachef import Lunachef
 
+from concurrent.futures import ThreadPoolExecutor, wait
 import os
+import time
 
 app = FastAPI()
 security = HTTPBasic()
@@ -37,7 +40,10 @@ def read_root():
 @app.get("/restart/{challenge}")
 def restart(challenge: str, credentials: HTTPBasicCredentials = Depends(security)):
     validate(credentials, challenge)
-    os.system(f"docker compose -f {settings.COMPOSE_LOCATION} restart {challenge}")
+    try:
+        get_docker().restart(challenges[challenge].container)
+    except (DockerError, OSError) as e:
+        raise HTTPException(status_code=500, detail=f"Error restarting challenge: {e}")
     return {"message": "Challenge restarted"}
 
 
@@ -78,6 +84,18 @@ def receive(data: Flag, credentials: HTTPBasicCredentials = Depends(security)):
     raise HTTPException(status_code=500, detail="Error receiving flag")
 
 
+@app.get("/check")
+def check_all(credentials: HTTPBasicCredentials = Depends(security)):
+    if not is_admin(credentials):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    results = run_checks(challenges, settings.CHECK_TIMEOUT)
+    return {
+        "success": all(result["success"] for result in results.values()),
+        "results": results,
+    }
+
+
 @app.get("/check/{challenge}")
 def check(challenge: str, credentials: HTTPBasicCredentials = Depends(security)):
     validate(credentials, challenge)
@@ -89,6 +107,39 @@ def history(data: History):
         f.write(data.log + '\n')
     return {"message": "Command received"}
 
+
+def run_checks(targets, timeout):
+    # Every check gets its own worker so the sweep takes as long as the
+    # slowest checker. A hung checker cannot be killed, so the pool is not
+    # waited on: its thread is left behind and reported as timed out.
+    if not targets:
+        return {}
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="check")
+    futures = {name: executor.submit(timed_check, challenge) for name, challenge in targets.items()}
+    wait(futures.values(), timeout=timeout)
+    executor.shutdown(wait=False)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            results[name] = {"success": False, "timeout": True, "elapsed": round(time.monotonic() - started, 3)}
+            continue
+        success, elapsed = future.result()
+        results[name] = {"success": success, "timeout": False, "elapsed": elapsed}
+    return results
+
+
+def timed_check(challenge):
+    started = time.monotonic()
+    try:
+        success = bool(challenge.check())
+    except Exception as e:
+        challenge.logger.error(f'Check raised for {type(challenge).__name__}: {e}')
+        success = False
+    return success, round(time.monotonic() - started, 3)
+
+
 def is_admin(credentials):
     if credentials.username != settings.ADMIN_USERNAME or credentials.password != settings.ADMIN_PASSWORD:
         return False
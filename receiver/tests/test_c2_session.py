@@ -0,0 +1,107 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from challenges.C2Session import C2Session  # noqa: E402
+from docker_client import ExecResult  # noqa: E402
+
+BANNER = (
+    '\n╔════╗\n║  🇮🇩 TNI COMMAND CENTER 🇮🇩  ║\n╚════╝\n\n'
+    "C2 System Online - Ketik 'help' untuk bantuan\n"
+).encode()
+
+# What tni_c2_system prints for the probes C2.check queues. Input is not
+# echoed, and the classified command prints its freed chunk: the tcache
+# pointer bytes end up right before the next prompt with no newline.
+TRANSCRIPT = BANNER + b''.join([
+    b'C2> C2 Log: test_data\nMemproses komando: test_data\n',
+    b'C2> C2 Diagnostics - Masukkan parameter: '
+    + b''.join(b'Diagnostic %d: test_diag\n\n' % i for i in range(5)),
+    b'C2> C2: Masukkan data rahasia: Data tersimpan di alamat: 0x558bc44fb2c0\n'
+    b'Data masih dapat diakses: \xfbD\xbcX\x05',
+    b'C2> Nama perwira: Pangkat: ',
+    b'C2> Network Interface - Masukkan data paket: Paket diproses: test_packet\n\n',
+    b'C2> Available commands:\n  process <data>     - Process command data\n',
+    b'C2> C2 Log: ' + b'A' * 50 + b'\nMemproses komando: ' + b'A' * 50 + b'\n',
+    b'C2> C2 System Shutdown...\n',
+])
+
+
+class FakeDocker(object):
+    def __init__(self, stdout=b'', timeout=False):
+        self.stdout = stdout
+        self.timeout = timeout
+        self.calls = []
+
+    def exec_run(self, container, cmd, stdin=None, timeout=None):
+        self.calls.append((container, cmd, stdin, timeout))
+        if self.timeout:
+            raise TimeoutError
+        # Decoded the way DockerClient decodes exec output
+        return ExecResult(0, self.stdout.decode('utf-8', 'replace'), '')
+
+
+def c2_probes(session):
+    session.add('process', 'process test_data')
+    session.add('diagnostic', 'diagnostic', 'test_diag')
+    session.add('classified', 'classified', 'test_classified_data')
+    session.add('officer', 'officer', 'Test Officer', 'Kapten')
+    session.add('network', 'network', 'test_packet')
+    session.add('help', 'help')
+    session.add('overflow', 'process ' + 'A' * 50)
+    return session
+
+
+def test_run_splits_output_per_probe():
+    docker = FakeDocker(TRANSCRIPT)
+    out = c2_probes(C2Session('c2', timeout=15, docker=docker)).run()
+
+    container, cmd, stdin, timeout = docker.calls[0]
+    assert len(docker.calls) == 1
+    assert (container, cmd, timeout) == ('c2', ['timeout', '15', '/usr/local/bin/tni_c2_system'], 17)
+    assert stdin == (
+        'process test_data\ndiagnostic\ntest_diag\nclassified\ntest_classified_data\n'
+        'officer\nTest Officer\nKapten\nnetwork\ntest_packet\nhelp\n'
+        'process ' + 'A' * 50 + '\nexit\n'
+    )
+
+    assert list(out) == ['banner', 'process', 'diagnostic', 'classified', 'officer', 'network', 'help', 'overflow']
+    assert 'TNI COMMAND CENTER' in out['banner']
+    assert out['process'] == 'C2 Log: test_data\nMemproses komando: test_data\n'
+    assert out['diagnostic'].count('Diagnostic ') == 5
+    assert out['officer'] == 'Nama perwira: Pangkat: '
+    assert 'Paket diproses: test_packet' in out['network']
+    assert out['help'].startswith('Available commands:\n  process <data>')
+
+
+def test_uaf_garbage_stays_in_classified_segment():
+    out = c2_probes(C2Session('c2', docker=FakeDocker(TRANSCRIPT))).run()
+
+    assert 'Data tersimpan di alamat:' in out['classified']
+    assert out['classified'].endswith('Data masih dapat diakses: �D�X\x05')
+    assert out['officer'].startswith('Nama perwira:')
+    assert out['overflow'] == 'C2 Log: {0}\nMemproses komando: {0}\n'.format('A' * 50)
+
+
+def test_missing_prompts_leave_probes_empty():
+    # The binary was killed by timeout after the classified probe
+    cut = TRANSCRIPT.index(b'C2> Nama perwira')
+    out = c2_probes(C2Session('c2', docker=FakeDocker(TRANSCRIPT[:cut]))).run()
+
+    assert 'Data masih dapat diakses:' in out['classified']
+    assert [out[name] for name in ('officer', 'network', 'help', 'overflow')] == ['', '', '', '']
+
+
+def test_exec_timeout_gives_empty_output():
+    out = c2_probes(C2Session('c2', docker=FakeDocker(timeout=True))).run()
+    assert set(out.values()) == {''}
+
+
+def test_inspect_reads_flag_and_paths():
+    docker = FakeDocker(b'0\n1\nFLAG{c2}\n')
+    flag, exists = C2Session('c2', docker=docker).inspect('/flag.txt', ['/bin/c2', '/opt/token'])
+
+    assert flag == 'FLAG{c2}'
+    assert exists == {'/bin/c2': True, '/opt/token': False}
+    assert docker.calls[0][1] == ['sh', '-c', 'test -f /bin/c2; echo $?; test -f /opt/token; echo $?; cat /flag.txt']
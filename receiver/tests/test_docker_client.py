@@ -0,0 +1,208 @@
+import http.client
+import json
+import os
+import shutil
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from docker_client import DockerClient, DockerError  # noqa: E402
+
+
+def frame(stream, data):
+    return bytes([stream, 0, 0, 0]) + len(data).to_bytes(4, 'big') + data
+
+
+class FakeDockerHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough of the Engine API for DockerClient."""
+
+    def handle(self):
+        self.server.connections += 1
+        while True:
+            request_line = self.rfile.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode().split(' ', 2)
+            headers = {}
+            while True:
+                line = self.rfile.readline().decode()
+                if line in ('\r\n', ''):
+                    break
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            body = json.loads(self.rfile.read(length)) if length else None
+            self.server.requests.append((method, target, body))
+            if self.server.drop_unanswered:
+                # The daemon got the request but the reply never arrives
+                self.server.drop_unanswered = False
+                return
+
+            if target.endswith('/start'):
+                self.exec_start(target.split('/')[3])
+                return
+            status, payload = self.route(method, target, body)
+            data = json.dumps(payload).encode() if payload is not None else b''
+            self.wfile.write(
+                f'HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n'
+                f'Content-Length: {len(data)}\r\n\r\n'.encode() + data
+            )
+            self.wfile.flush()
+            if self.server.drop_idle:
+                # Like a daemon closing an idle keep-alive connection
+                self.server.drop_idle = False
+                return
+
+    def route(self, method, target, body):
+        path = target.split('?', 1)[0]
+        parts = path.split('/')
+        if method == 'POST' and path.endswith('/exec'):
+            if parts[3] != 'svc':
+                return 404, {'message': f'No such container: {parts[3]}'}
+            self.server.execs['e1'] = body
+            return 201, {'Id': 'e1'}
+        if method == 'GET' and path.endswith('/json') and parts[2] == 'exec':
+            return 200, {'ExitCode': self.server.exit_code}
+        if method == 'POST' and path.endswith('/restart'):
+            return 204, None
+        return 404, {'message': 'page not found'}
+
+    def exec_start(self, exec_id):
+        self.wfile.write(
+            b'HTTP/1.1 101 UPGRADED\r\nContent-Type: application/vnd.docker.raw-stream\r\n'
+            b'Connection: Upgrade\r\nUpgrade: tcp\r\n\r\n'
+        )
+        self.wfile.flush()
+        if self.server.hang:
+            time.sleep(self.server.hang)
+            return
+        out = []
+        if self.server.execs[exec_id]['AttachStdin']:
+            # Only returns once the client shuts down its write side
+            stdin = self.rfile.read()
+            out.append(frame(1, b'stdin:' + stdin))
+        out += [frame(1, b'hello '), frame(2, b'oops'), frame(1, b'world'), frame(2, b'!')]
+        self.wfile.write(b''.join(out))
+        self.wfile.flush()
+
+
+class FakeDocker(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        super().__init__(path, FakeDockerHandler)
+        self.requests = []
+        self.execs = {}
+        self.connections = 0
+        self.exit_code = 0
+        self.hang = 0
+        self.drop_idle = False
+        self.drop_unanswered = False
+
+
+@pytest.fixture
+def docker():
+    tmp = tempfile.mkdtemp(prefix='fakedocker')
+    path = os.path.join(tmp, 'docker.sock')
+    server = FakeDocker(path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, DockerClient(path, timeout=5)
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_exec_run_demuxes_stdout_and_stderr(docker):
+    server, client = docker
+    server.exit_code = 3
+    result = client.exec_run('svc', ['cat', '/flag.txt'])
+
+    assert result == (3, 'hello world', 'oops!')
+    assert server.execs['e1']['Cmd'] == ['cat', '/flag.txt']
+    assert server.execs['e1']['AttachStdin'] is False
+    methods = [(m, t) for m, t, _ in server.requests]
+    assert methods == [
+        ('POST', '/v1.41/containers/svc/exec'),
+        ('POST', '/v1.41/exec/e1/start'),
+        ('GET', '/v1.41/exec/e1/json'),
+    ]
+
+
+def test_exec_run_sends_stdin_and_shuts_down_write_side(docker):
+    server, client = docker
+    result = client.exec_run('svc', ['sh'], stdin='id\n')
+
+    assert server.execs['e1']['AttachStdin'] is True
+    assert result.stdout == 'stdin:id\nhello world'
+    assert result.stderr == 'oops!'
+
+
+def test_exec_run_times_out_at_deadline(docker):
+    server, client = docker
+    server.hang = 3
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        client.exec_run('svc', ['sleep', '10'], timeout=0.5)
+    assert time.monotonic() - started < 2
+
+
+def test_restart(docker):
+    server, client = docker
+    assert client.restart('svc', timeout=7) is None
+    assert server.requests[-1][:2] == ('POST', '/v1.41/containers/svc/restart?t=7')
+
+
+def test_error_message_is_raised(docker):
+    server, client = docker
+    with pytest.raises(DockerError) as excinfo:
+        client.exec_run('missing', ['true'])
+    assert excinfo.value.status == 404
+    assert excinfo.value.message == 'No such container: missing'
+
+
+def test_pooled_connection_is_reused(docker):
+    server, client = docker
+    client.restart('svc')
+    client.restart('svc')
+    assert server.connections == 1
+
+
+def test_retries_after_stale_pooled_connection(docker):
+    server, client = docker
+    server.drop_idle = True
+    client.restart('svc')
+    # Let the server finish closing the pooled connection
+    time.sleep(0.1)
+
+    client.restart('svc', timeout=3)
+
+    assert server.connections == 2
+    assert server.requests[-1][:2] == ('POST', '/v1.41/containers/svc/restart?t=3')
+    assert client._pool.qsize() == 1
+
+
+def test_get_is_retried_when_reply_is_lost(docker):
+    server, client = docker
+    client.restart('svc')
+    server.drop_unanswered = True
+
+    assert client._json('GET', '/exec/e1/json') == {'ExitCode': 0}
+    assert [m for m, _, _ in server.requests] == ['POST', 'GET', 'GET']
+    assert server.connections == 2
+
+
+def test_post_is_not_resent_when_reply_is_lost(docker):
+    server, client = docker
+    client.restart('svc')
+    server.drop_unanswered = True
+
+    with pytest.raises(http.client.HTTPException):
+        client.restart('svc')
+    assert [m for m, _, _ in server.requests] == ['POST', 'POST']
+    assert server.connections == 1
@@ -1,4 +1,6 @@
-from flask import Blueprint, render_template, request, jsonify
+from itertools import chain
+
+from flask import Blueprint, render_template, request, jsonify, Response, stream_with_context
 
 from config import key
 from config import hash_key
@@ -10,6 +12,22 @@ from services.service_signing import SigningService
 # Create blueprint
 crypto_bp = Blueprint('crypto', __name__)
 
+STREAM_CHUNK_SIZE = 64 * 1024
+MAX_SIGN_BATCH = 256
+
+def read_body_chunks(chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the raw request body in chunks"""
+    while True:
+        chunk = request.stream.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+def stream_output(output):
+    """Run a streaming service up to its first piece so early errors become JSON"""
+    first = next(output, '')
+    return Response(stream_with_context(chain([first], output)), mimetype='text/plain')
+
 @crypto_bp.route('/crypto')
 def crypto_page():
     """Render the crypto operations page"""
@@ -46,6 +64,28 @@ def decrypt_text():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@crypto_bp.route('/encrypt/stream', methods=['POST'])
+def encrypt_stream():
+    """Encrypt the raw request body, streaming hex ciphertext back"""
+    try:
+        encryption_service = EncryptionService(key)
+        return stream_output(encryption_service.encrypt_stream(read_body_chunks()))
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Encryption failed: {str(e)}'})
+
+@crypto_bp.route('/decrypt/stream', methods=['POST'])
+def decrypt_stream():
+    """Decrypt hex ciphertext from the raw request body, streaming plaintext back"""
+    try:
+        # Whitespace such as a trailing newline from the client is ignored
+        hex_chunks = (''.join(chunk.decode('ascii').split()) for chunk in read_body_chunks())
+        encryption_service = EncryptionService(key)
+        return stream_output(encryption_service.decrypt_stream(hex_chunks))
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Decryption failed: {str(e)}'})
+
 @crypto_bp.route('/sign', methods=['POST'])
 def sign_data():
     """Sign data using simplified service"""
@@ -62,6 +102,24 @@ def sign_data():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@crypto_bp.route('/sign/batch', methods=['POST'])
+def sign_batch():
+    """Sign every `data` field of the form in one pass"""
+    try:
+        messages = [data.strip() for data in request.form.getlist('data')]
+        
+        if not messages or not all(messages):
+            return jsonify({'success': False, 'error': 'Data is required'})
+        if len(messages) > MAX_SIGN_BATCH:
+            return jsonify({'success': False, 'error': f'At most {MAX_SIGN_BATCH} messages per batch'})
+        
+        signing_service = SigningService(4, signing_key)
+        result = signing_service.sign_many(messages)
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 @crypto_bp.route('/verify', methods=['POST'])
 def verify_signature():
     """Verify signature using simplified service"""
@@ -4,6 +4,7 @@ Script to generate self-signed SSL certificates for LunaChef HTTPS server
 """
 
 import os
+import ipaddress
 from cryptography import x509
 from cryptography.x509.oid import NameOID
 from cryptography.hazmat.primitives import hashes, serialization
@@ -79,7 +80,6 @@ def generate_self_signed_cert(hostname="localhost", cert_dir="certs"):
 
 if __name__ == "__main__":
     import argparse
-    import ipaddress
     
     parser = argparse.ArgumentParser(description="Generate self-signed SSL certificate for LunaChef")
     parser.add_argument("--hostname", default="localhost", help="Hostname for certificate (default: localhost)")
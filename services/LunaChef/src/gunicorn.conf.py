@@ -0,0 +1,42 @@
+"""
+Gunicorn settings for running LunaChef with pre-forked workers
+
+Usage: gunicorn -c gunicorn.conf.py 'main:create_app()'
+"""
+
+import multiprocessing
+import os
+
+from main import load_environment, str_to_bool, ensure_certificates
+
+load_environment()
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{int(os.getenv('PORT', 5000))}"
+
+# Signing and encryption are CPU-bound, so scale with processes; the
+# threads only cover requests waiting on the network. Each worker holds
+# its own crypto contexts, so the default stays small on big hosts
+workers = int(os.getenv('WORKERS', min(multiprocessing.cpu_count(), 4)))
+threads = int(os.getenv('THREADS', 2))
+worker_class = 'gthread'
+timeout = int(os.getenv('WORKER_TIMEOUT', 60))
+
+accesslog = '-'
+errorlog = '-'
+
+if str_to_bool(os.getenv('USE_HTTPS', 'false')):
+    certificates = ensure_certificates()
+    if certificates:
+        certfile, keyfile = certificates
+    else:
+        print("⚠️  SSL setup failed, falling back to HTTP")
+
+
+def post_worker_init(worker):
+    """Warm the crypto contexts before the worker accepts traffic"""
+    from main import warm_crypto_contexts
+    
+    try:
+        warm_crypto_contexts()
+    except Exception as e:
+        worker.log.warning(f"Could not warm crypto contexts: {e}")
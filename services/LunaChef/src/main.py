@@ -90,8 +90,8 @@ def create_app():
     
     return app
 
-def setup_ssl_context():
-    """Setup SSL context for HTTPS"""
+def ensure_certificates():
+    """Return (cert_file, key_file), generating a self-signed pair if missing"""
     cert_dir = os.path.join(os.path.dirname(__file__), 'certs')
     cert_file = os.path.join(cert_dir, 'server.crt')
     key_file = os.path.join(cert_dir, 'server.key')
@@ -109,11 +109,28 @@ def setup_ssl_context():
             print(f"❌ Error generating certificates: {e}")
             return None
     
+    return cert_file, key_file
+
+def setup_ssl_context():
+    """Setup SSL context for HTTPS"""
+    certificates = ensure_certificates()
+    if not certificates:
+        return None
+    
     # Create SSL context
     context = ssl.SSLContext(ssl.PROTOCOL_TLSv1_2)
-    context.load_cert_chain(cert_file, key_file)
+    context.load_cert_chain(*certificates)
     return context
 
+def warm_crypto_contexts():
+    """Build the shared key schedules, tables and keygen before serving"""
+    from config import key, signing_key
+    from services.service_encryption import EncryptionService
+    from services.service_signing import SigningService
+    
+    EncryptionService(key)
+    SigningService(4, signing_key)
+
 if __name__ == '__main__':
     app = create_app()
     debug_mode = str_to_bool(os.getenv('FLASK_DEBUG', 'false'))
@@ -16,10 +16,19 @@ patching_notes:
     message = FLAG + message
 """
 
+import codecs
 import json
 import hashlib
+import os
+import struct
+from array import array
 from typing import List
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 dpolynom ='''
 {
   "Po0": [
@@ -2626,6 +2635,54 @@ def _load_polynom():
     return obj
 
 
+class _CipherContext:
+    """Process-wide state shared by every EncryptionService.
+
+    The polynom tables are parsed once into uint32 arrays, key schedules
+    are cached per key and the flag is re-read only when its mtime changes.
+    """
+
+    def __init__(self):
+        self._polynom = None
+        self._round_keys = {}
+        self._decrypt_round_keys = {}
+        self._flag = None
+        self._flag_mtime = None
+
+    def polynom(self):
+        if self._polynom is None:
+            self._polynom = {
+                k: array("I", v) if isinstance(v, list) else v
+                for k, v in _load_polynom().items()
+            }
+        return self._polynom
+
+    def round_keys(self, key: bytes) -> List[int]:
+        key = bytes(key)
+        rk = self._round_keys.get(key)
+        if rk is None:
+            rk = self._round_keys[key] = ke44(key, self.polynom())
+        return rk
+
+    def decrypt_round_keys(self, key: bytes) -> List[int]:
+        key = bytes(key)
+        drk = self._decrypt_round_keys.get(key)
+        if drk is None:
+            drk = self._decrypt_round_keys[key] = derive_decrypt_round_keys(self.round_keys(key))
+        return drk
+
+    def flag(self, path: str = "/flag.txt") -> bytes:
+        mtime = os.stat(path).st_mtime_ns
+        if self._flag is None or mtime != self._flag_mtime:
+            with open(path) as f:
+                self._flag = f.read().strip().encode()
+            self._flag_mtime = mtime
+        return self._flag
+
+
+_context = _CipherContext()
+
+
 def _bytes_to_words_be(b: bytes) -> List[int]:
     assert len(b) % 4 == 0
     return [int.from_bytes(b[i : i + 4], "big") for i in range(0, len(b), 4)]
@@ -2635,19 +2692,35 @@ def _words_to_bytes_be(words: List[int]) -> bytes:
     return b"".join(w.to_bytes(4, "big") for w in words)
 
 
+def _build_gf_tables():
+    # Powers of the generator 0x03 over GF(2^8); exp is doubled so that
+    # exp[log[a] + log[b]] never needs a modulo.
+    exp = [0] * 510
+    log = [0] * 256
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x ^= ((x << 1) ^ (0x1B if x & 0x80 else 0)) & 0xFF
+    exp[255:] = exp[:255]
+    return exp, log
+
+
+_GF_EXP, _GF_LOG = _build_gf_tables()
+
+
 def _gf_mul(a: int, b: int) -> int:
-    res = 0
     aa = a & 0xFF
     bb = b & 0xFF
-    for _ in range(8):
-        if bb & 1:
-            res ^= aa
-        hi = aa & 0x80
-        aa = (aa << 1) & 0xFF
-        if hi:
-            aa ^= 0x1B
-        bb >>= 1
-    return res & 0xFF
+    if not aa or not bb:
+        return 0
+    return _GF_EXP[_GF_LOG[aa] + _GF_LOG[bb]]
+
+
+_MUL9 = bytes(_gf_mul(x, 0x09) for x in range(256))
+_MULB = bytes(_gf_mul(x, 0x0B) for x in range(256))
+_MULD = bytes(_gf_mul(x, 0x0D) for x in range(256))
+_MULE = bytes(_gf_mul(x, 0x0E) for x in range(256))
 
 
 def _inv_mix_columns_word(w: int) -> int:
@@ -2655,10 +2728,10 @@ def _inv_mix_columns_word(w: int) -> int:
     b1 = (w >> 16) & 0xFF
     b2 = (w >> 8) & 0xFF
     b3 = w & 0xFF
-    y0 = _gf_mul(b0, 0x0E) ^ _gf_mul(b1, 0x0B) ^ _gf_mul(b2, 0x0D) ^ _gf_mul(b3, 0x09)
-    y1 = _gf_mul(b0, 0x09) ^ _gf_mul(b1, 0x0E) ^ _gf_mul(b2, 0x0B) ^ _gf_mul(b3, 0x0D)
-    y2 = _gf_mul(b0, 0x0D) ^ _gf_mul(b1, 0x09) ^ _gf_mul(b2, 0x0E) ^ _gf_mul(b3, 0x0B)
-    y3 = _gf_mul(b0, 0x0B) ^ _gf_mul(b1, 0x0D) ^ _gf_mul(b2, 0x09) ^ _gf_mul(b3, 0x0E)
+    y0 = _MULE[b0] ^ _MULB[b1] ^ _MULD[b2] ^ _MUL9[b3]
+    y1 = _MUL9[b0] ^ _MULE[b1] ^ _MULB[b2] ^ _MULD[b3]
+    y2 = _MULD[b0] ^ _MUL9[b1] ^ _MULE[b2] ^ _MULB[b3]
+    y3 = _MULB[b0] ^ _MULD[b1] ^ _MUL9[b2] ^ _MULE[b3]
     return (y0 << 24) | (y1 << 16) | (y2 << 8) | y3
 
 
@@ -2775,6 +2848,103 @@ def encrypt_block_tt(plaintext16: bytes, round_keys: List[int], polynom) -> byte
     return _words_to_bytes_be([out0, out1, out2, out3])
 
 
+# Below this many blocks the NumPy setup costs more than it saves
+_NUMPY_MIN_BLOCKS = 8
+
+
+def encrypt_blocks_tt(plaintext: bytes, round_keys: List[int], polynom) -> bytes:
+    """Encrypts every 16-byte block of ``plaintext``.
+
+    Same result as ``encrypt_block_tt`` on each block. Long messages run
+    all blocks through the rounds together with NumPy table gathers; short
+    ones, or hosts without NumPy, use a flat scalar loop.
+    """
+    if len(plaintext) % 16 != 0:
+        raise ValueError("plaintext must be a multiple of 16 bytes")
+    if np is not None and len(plaintext) >= 16 * _NUMPY_MIN_BLOCKS:
+        return _encrypt_blocks_np(plaintext, round_keys, polynom)
+
+    Po0 = polynom["Po0"]
+    Po1 = polynom["Po1"]
+    Po2 = polynom["Po2"]
+    Po3 = polynom["Po3"]
+    sb = bytes((polynom["Po4"][x] >> 24) & 0xFF for x in range(256))
+    rk = round_keys
+    unpack_from = struct.unpack_from
+    pack_into = struct.pack_into
+    out = bytearray(len(plaintext))
+
+    for off in range(0, len(plaintext), 16):
+        p0, p1, p2, p3 = unpack_from(">4I", plaintext, off)
+        s0 = p0 ^ rk[0]
+        s1 = p1 ^ rk[1]
+        s2 = p2 ^ rk[2]
+        s3 = p3 ^ rk[3]
+
+        for idx in range(4, 40, 4):
+            s0, s1, s2, s3 = (
+                Po0[s0 >> 24] ^ Po1[(s1 >> 16) & 0xFF] ^ Po2[(s2 >> 8) & 0xFF] ^ Po3[s3 & 0xFF] ^ rk[idx],
+                Po0[s1 >> 24] ^ Po1[(s2 >> 16) & 0xFF] ^ Po2[(s3 >> 8) & 0xFF] ^ Po3[s0 & 0xFF] ^ rk[idx + 1],
+                Po0[s2 >> 24] ^ Po1[(s3 >> 16) & 0xFF] ^ Po2[(s0 >> 8) & 0xFF] ^ Po3[s1 & 0xFF] ^ rk[idx + 2],
+                Po0[s3 >> 24] ^ Po1[(s0 >> 16) & 0xFF] ^ Po2[(s1 >> 8) & 0xFF] ^ Po3[s2 & 0xFF] ^ rk[idx + 3],
+            )
+
+        pack_into(
+            ">4I", out, off,
+            ((sb[s0 >> 24] << 24) | (sb[(s1 >> 16) & 0xFF] << 16) | (sb[(s2 >> 8) & 0xFF] << 8) | sb[s3 & 0xFF]) ^ rk[40],
+            ((sb[s1 >> 24] << 24) | (sb[(s2 >> 16) & 0xFF] << 16) | (sb[(s3 >> 8) & 0xFF] << 8) | sb[s0 & 0xFF]) ^ rk[41],
+            ((sb[s2 >> 24] << 24) | (sb[(s3 >> 16) & 0xFF] << 16) | (sb[(s0 >> 8) & 0xFF] << 8) | sb[s1 & 0xFF]) ^ rk[42],
+            ((sb[s3 >> 24] << 24) | (sb[(s0 >> 16) & 0xFF] << 16) | (sb[(s1 >> 8) & 0xFF] << 8) | sb[s2 & 0xFF]) ^ rk[43],
+        )
+
+    return bytes(out)
+
+
+def _encrypt_blocks_np(plaintext: bytes, round_keys: List[int], polynom) -> bytes:
+    Po0 = np.asarray(polynom["Po0"], dtype=np.uint32)
+    Po1 = np.asarray(polynom["Po1"], dtype=np.uint32)
+    Po2 = np.asarray(polynom["Po2"], dtype=np.uint32)
+    Po3 = np.asarray(polynom["Po3"], dtype=np.uint32)
+    sb = (np.asarray(polynom["Po4"], dtype=np.uint32) >> 24) & 0xFF
+    rk = np.asarray(round_keys, dtype=np.uint32)
+
+    # One row per block, one column per big-endian state word
+    state = np.frombuffer(plaintext, dtype=">u4").reshape(-1, 4).astype(np.uint32)
+    s0 = state[:, 0] ^ rk[0]
+    s1 = state[:, 1] ^ rk[1]
+    s2 = state[:, 2] ^ rk[2]
+    s3 = state[:, 3] ^ rk[3]
+
+    for idx in range(4, 40, 4):
+        b0 = s0 >> 24
+        b1 = s1 >> 24
+        b2 = s2 >> 24
+        b3 = s3 >> 24
+        c0 = (s0 >> 16) & 0xFF
+        c1 = (s1 >> 16) & 0xFF
+        c2 = (s2 >> 16) & 0xFF
+        c3 = (s3 >> 16) & 0xFF
+        d0 = (s0 >> 8) & 0xFF
+        d1 = (s1 >> 8) & 0xFF
+        d2 = (s2 >> 8) & 0xFF
+        d3 = (s3 >> 8) & 0xFF
+        e0 = s0 & 0xFF
+        e1 = s1 & 0xFF
+        e2 = s2 & 0xFF
+        e3 = s3 & 0xFF
+        s0 = Po0[b0] ^ Po1[c1] ^ Po2[d2] ^ Po3[e3] ^ rk[idx]
+        s1 = Po0[b1] ^ Po1[c2] ^ Po2[d3] ^ Po3[e0] ^ rk[idx + 1]
+        s2 = Po0[b2] ^ Po1[c3] ^ Po2[d0] ^ Po3[e1] ^ rk[idx + 2]
+        s3 = Po0[b3] ^ Po1[c0] ^ Po2[d1] ^ Po3[e2] ^ rk[idx + 3]
+
+    out = np.empty((len(s0), 4), dtype=">u4")
+    out[:, 0] = ((sb[s0 >> 24] << 24) | (sb[(s1 >> 16) & 0xFF] << 16) | (sb[(s2 >> 8) & 0xFF] << 8) | sb[s3 & 0xFF]) ^ rk[40]
+    out[:, 1] = ((sb[s1 >> 24] << 24) | (sb[(s2 >> 16) & 0xFF] << 16) | (sb[(s3 >> 8) & 0xFF] << 8) | sb[s0 & 0xFF]) ^ rk[41]
+    out[:, 2] = ((sb[s2 >> 24] << 24) | (sb[(s3 >> 16) & 0xFF] << 16) | (sb[(s0 >> 8) & 0xFF] << 8) | sb[s1 & 0xFF]) ^ rk[42]
+    out[:, 3] = ((sb[s3 >> 24] << 24) | (sb[(s0 >> 16) & 0xFF] << 16) | (sb[(s1 >> 8) & 0xFF] << 8) | sb[s2 & 0xFF]) ^ rk[43]
+    return out.tobytes()
+
+
 def derive_decrypt_round_keys(enc_round_keys: List[int]) -> List[int]:
     if len(enc_round_keys) != 44:
         raise ValueError("enc_round_keys must contain 44")
@@ -2787,7 +2957,7 @@ def derive_decrypt_round_keys(enc_round_keys: List[int]) -> List[int]:
     return dec
 
 
-def decrypt_block_tt(ciphertext16: bytes, enc_round_keys: List[int], polynom) -> bytes:
+def decrypt_block_tt(ciphertext16: bytes, enc_round_keys: List[int], polynom, dec_round_keys: List[int] = None) -> bytes:
     if len(ciphertext16) != 16:
         raise ValueError("ciphertext must be 16 bytes")
     Pf0 = polynom.get("Pf0")
@@ -2798,7 +2968,7 @@ def decrypt_block_tt(ciphertext16: bytes, enc_round_keys: List[int], polynom) ->
     if not (Pf0 and Pf1 and Pf2 and Pf3 and Pf4):
         raise ValueError("Pf polynom (Pf0..Pf4) missing in polynom JSON; re-generate polynom")
 
-    rk = derive_decrypt_round_keys(enc_round_keys)
+    rk = dec_round_keys or derive_decrypt_round_keys(enc_round_keys)
 
     s = _bytes_to_words_be(ciphertext16)
     s0 = s[0] ^ rk[0]
@@ -2878,14 +3048,63 @@ def decrypt_block_tt(ciphertext16: bytes, enc_round_keys: List[int], polynom) ->
 
     return _words_to_bytes_be([out0, out1, out2, out3])
 
+
+def decrypt_blocks_tt(ciphertext: bytes, enc_round_keys: List[int], polynom, dec_round_keys: List[int] = None) -> bytes:
+    """Decrypts every 16-byte block of ``ciphertext`` with one key schedule.
+
+    Same result as ``decrypt_block_tt`` on each block, but the decrypt
+    round keys are derived (or passed in) once for the whole message.
+    """
+    if len(ciphertext) % 16 != 0:
+        raise ValueError("ciphertext must be a multiple of 16 bytes")
+    Pf0 = polynom.get("Pf0")
+    Pf1 = polynom.get("Pf1")
+    Pf2 = polynom.get("Pf2")
+    Pf3 = polynom.get("Pf3")
+    Pf4 = polynom.get("Pf4")
+    if not (Pf0 and Pf1 and Pf2 and Pf3 and Pf4):
+        raise ValueError("Pf polynom (Pf0..Pf4) missing in polynom JSON; re-generate polynom")
+
+    rk = dec_round_keys or derive_decrypt_round_keys(enc_round_keys)
+    isb = bytes((Pf4[x] >> 24) & 0xFF for x in range(256))
+    unpack_from = struct.unpack_from
+    pack_into = struct.pack_into
+    out = bytearray(len(ciphertext))
+
+    for off in range(0, len(ciphertext), 16):
+        c0, c1, c2, c3 = unpack_from(">4I", ciphertext, off)
+        s0 = c0 ^ rk[0]
+        s1 = c1 ^ rk[1]
+        s2 = c2 ^ rk[2]
+        s3 = c3 ^ rk[3]
+
+        for idx in range(4, 40, 4):
+            s0, s1, s2, s3 = (
+                Pf0[s0 >> 24] ^ Pf1[(s3 >> 16) & 0xFF] ^ Pf2[(s2 >> 8) & 0xFF] ^ Pf3[s1 & 0xFF] ^ rk[idx],
+                Pf0[s1 >> 24] ^ Pf1[(s0 >> 16) & 0xFF] ^ Pf2[(s3 >> 8) & 0xFF] ^ Pf3[s2 & 0xFF] ^ rk[idx + 1],
+                Pf0[s2 >> 24] ^ Pf1[(s1 >> 16) & 0xFF] ^ Pf2[(s0 >> 8) & 0xFF] ^ Pf3[s3 & 0xFF] ^ rk[idx + 2],
+                Pf0[s3 >> 24] ^ Pf1[(s2 >> 16) & 0xFF] ^ Pf2[(s1 >> 8) & 0xFF] ^ Pf3[s0 & 0xFF] ^ rk[idx + 3],
+            )
+
+        pack_into(
+            ">4I", out, off,
+            ((isb[s0 >> 24] << 24) | (isb[(s3 >> 16) & 0xFF] << 16) | (isb[(s2 >> 8) & 0xFF] << 8) | isb[s1 & 0xFF]) ^ rk[40],
+            ((isb[s1 >> 24] << 24) | (isb[(s0 >> 16) & 0xFF] << 16) | (isb[(s3 >> 8) & 0xFF] << 8) | isb[s2 & 0xFF]) ^ rk[41],
+            ((isb[s2 >> 24] << 24) | (isb[(s1 >> 16) & 0xFF] << 16) | (isb[(s0 >> 8) & 0xFF] << 8) | isb[s3 & 0xFF]) ^ rk[42],
+            ((isb[s3 >> 24] << 24) | (isb[(s2 >> 16) & 0xFF] << 16) | (isb[(s1 >> 8) & 0xFF] << 8) | isb[s0 & 0xFF]) ^ rk[43],
+        )
+
+    return bytes(out)
+
 class EncryptionService:
     def __init__(self, KEY, FLAG=None):
-        self.polynom = _load_polynom()
+        self.polynom = _context.polynom()
         self.key = KEY
-        self.rk = ke44(self.key, self.polynom)
+        self.rk = _context.round_keys(self.key)
+        self.drk = _context.decrypt_round_keys(self.key)
         # for SLA check Dont change the variables names or types and FLAG valuea
         if not FLAG:
-            self.FLAG = open('/flag.txt').read().strip().encode()
+            self.FLAG = _context.flag()
         else:
             self.FLAG = FLAG
         # for SLA check Dont change the variables names or types and FLAG values
@@ -2919,9 +3138,7 @@ class EncryptionService:
             message_bytes = self.pad(message_bytes)
             hmesh = message_bytes+self.FLAG+self.key
             hash_message = hashlib.sha256(hmesh).hexdigest()
-            list_of_blocks = [message_bytes[i:i+16] for i in range(0, len(message_bytes), 16)]
-            encrypted_blocks = [encrypt_block_tt(block, self.rk, self.polynom).hex() for block in list_of_blocks]
-            ct = ''.join(encrypted_blocks) + hash_message
+            ct = encrypt_blocks_tt(message_bytes, self.rk, self.polynom).hex() + hash_message
             return {
                 'success': True,
                 'encrypted_data': ct,
@@ -2934,6 +3151,95 @@ class EncryptionService:
                 'error': f'Encryption failed: {str(e)}'
             }
     
+    def encrypt_stream(self, chunks):
+        """Encrypts the message read from ``chunks`` (an iterable of bytes).
+
+        Yields the same hex string as ``encrypt`` piece by piece, with the
+        SHA-256 trailer hashed as the blocks go by, so memory does not
+        grow with the message. Raises ValueError on the first ``next()``
+        if the message is empty.
+        """
+        chunks = iter(chunks)
+        pending = b''
+        for chunk in chunks:
+            if chunk:
+                pending = chunk
+                break
+        if not pending:
+            raise ValueError('Message is required for encryption')
+
+        # for SLA check give the flag on Suffix
+        pending = self.FLAG + pending
+        # end for SLA check give the flag on Suffix
+
+        digest = hashlib.sha256()
+        while True:
+            cut = len(pending) - len(pending) % 16
+            if cut:
+                blocks = pending[:cut]
+                pending = pending[cut:]
+                digest.update(blocks)
+                yield encrypt_blocks_tt(blocks, self.rk, self.polynom).hex()
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            pending += chunk
+
+        last = self.pad(pending)
+        digest.update(last + self.FLAG + self.key)
+        yield encrypt_blocks_tt(last, self.rk, self.polynom).hex() + digest.hexdigest()
+
+    def decrypt_stream(self, chunks):
+        """Decrypts hex ciphertext read from ``chunks`` (an iterable of str).
+
+        Yields the plaintext that ``decrypt`` would return, piece by piece.
+        The hash trailer and last block are held back for unpadding.
+        Nothing is yielded until the FLAG prefix has been checked, so that
+        failure surfaces on the first ``next()``. Later errors (bad length
+        or padding) raise mid-stream.
+        """
+        # Hash trailer plus the last block, in hex digits
+        holdback = 64 + 32
+        pending = ''
+        head = b''
+        checked = False
+        decoder = codecs.getincrementaldecoder('utf-8')()
+
+        def emit(plain):
+            nonlocal head, checked
+            if not checked:
+                head += plain
+                if len(head) < len(self.FLAG):
+                    return ''
+                # for SLA check give the flag on Suffix
+                if not head.startswith(self.FLAG):
+                    raise ValueError('Invalid flag')
+                plain = head[len(self.FLAG):]
+                # end for SLA check give the flag on Suffix
+                checked = True
+                head = b''
+            return decoder.decode(plain)
+
+        for chunk in chunks:
+            pending += chunk
+            cut = len(pending) - holdback
+            cut -= cut % 32
+            if cut > 0:
+                text = emit(decrypt_blocks_tt(bytes.fromhex(pending[:cut]), self.rk, self.polynom, self.drk))
+                pending = pending[cut:]
+                if text:
+                    yield text
+
+        if len(pending) < holdback or len(pending) % 32 != 0:
+            raise ValueError('Invalid encrypted data length')
+        last = decrypt_blocks_tt(bytes.fromhex(pending[:-64]), self.rk, self.polynom, self.drk)
+        text = emit(self.unpad(last))
+        if not checked:
+            raise ValueError('Invalid flag')
+        text += decoder.decode(b'', final=True)
+        if text:
+            yield text
+
     def decrypt(self, encrypted_data: str) -> dict:
         try:
             if not encrypted_data:
@@ -2950,9 +3256,7 @@ class EncryptionService:
             hash_message = encrypted_data[-64:]
             encrypted_data = encrypted_data[:-64]
             
-            list_of_blocks = [bytes.fromhex(encrypted_data[i:i+32]) for i in range(0, len(encrypted_data), 32)]
-            decrypted_blocks = [decrypt_block_tt(block, self.rk, self.polynom) for block in list_of_blocks]
-            decrypted_message = b''.join(decrypted_blocks)
+            decrypted_message = decrypt_blocks_tt(bytes.fromhex(encrypted_data), self.rk, self.polynom, self.drk)
             decrypted_message = self.unpad(decrypted_message)
             hash_message = hashlib.sha256(decrypted_message+self.FLAG+self.key).hexdigest()
             if hash_message != hash_message:
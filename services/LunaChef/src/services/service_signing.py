@@ -15,11 +15,19 @@ patching_notes:
 - dont change base and random seed if you use random
 """
 import hashlib
+import os
 import random
 import secrets
 import math
+import struct
+from functools import lru_cache
 from typing import List, Tuple
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 q = 12 * 1024 + 1
 n = 64
 
@@ -67,10 +75,130 @@ def negacyclic_reduce_coeffs(poly_long: List[int], n_local: int) -> List[int]:
             res[pos] = (res[pos] - c) % q
     return [x % q for x in res]
 
-def negacyclic_mul(a: List[int], b: List[int]) -> List[int]:
+def negacyclic_mul_plain(a: List[int], b: List[int]) -> List[int]:
     long = mul_plain(a, b)
     return negacyclic_reduce_coeffs(long, n)
 
+def negacyclic_mul(a: List[int], b: List[int]) -> List[int]:
+    if len(a) > n or len(b) > n:
+        # The schoolbook path raises on products it cannot fold
+        return negacyclic_mul_plain(a, b)
+    return intt(ntt_mul(ntt(a), ntt(b)))
+
+def negacyclic_mul_batch(polys: List[List[int]], b: List[int]) -> List[List[int]]:
+    """Multiplies every poly in ``polys`` by ``b``.
+
+    With NumPy the transforms of all rows run together, one vector op per
+    butterfly layer; a single n = 64 product is faster in plain Python.
+    """
+    if np is None or any(len(p) > n for p in polys) or len(b) > n:
+        return [negacyclic_mul(p, b) for p in polys]
+    if not polys:
+        return []
+    a_hat = _ntt_np(np.array([negacyclic_fold(p) for p in polys], dtype=np.int64))
+    b_hat = np.array(ntt(b), dtype=np.int64)
+    return _intt_np(a_hat * b_hat % q).tolist()
+
+# Negacyclic NTT: q = 1 mod 2n, so x^n + 1 splits into linear factors and
+# products in Z_q[x]/(x^n + 1) become pointwise products of transforms.
+def _primitive_2n_root() -> int:
+    for g in range(2, q):
+        psi = pow(g, (q - 1) // (2 * n), q)
+        if pow(psi, n, q) == q - 1:
+            return psi
+    raise ValueError("no primitive 2n-th root of unity mod q")
+
+def _bitrev(x: int, bits: int) -> int:
+    return int(format(x, f"0{bits}b")[::-1], 2)
+
+_PSI = _primitive_2n_root()
+_ZETAS = [pow(_PSI, _bitrev(k, n.bit_length() - 1), q) for k in range(n)]
+_N_INV = pow(n, q - 2, q)
+
+def negacyclic_fold(p: List[int]) -> List[int]:
+    res = [0] * n
+    for idx, coeff in enumerate(p):
+        if (idx // n) % 2:
+            res[idx % n] -= coeff
+        else:
+            res[idx % n] += coeff
+    return [x % q for x in res]
+
+def ntt(a: List[int]) -> List[int]:
+    a = negacyclic_fold(a)
+    k = 1
+    length = n // 2
+    while length >= 1:
+        for start in range(0, n, 2 * length):
+            zeta = _ZETAS[k]
+            k += 1
+            for j in range(start, start + length):
+                t = zeta * a[j + length] % q
+                a[j + length] = (a[j] - t) % q
+                a[j] = (a[j] + t) % q
+        length //= 2
+    return a
+
+def intt(a_hat: List[int]) -> List[int]:
+    a = list(a_hat)
+    k = n
+    length = 1
+    while length < n:
+        for start in range(0, n, 2 * length):
+            k -= 1
+            zeta = q - _ZETAS[k]
+            for j in range(start, start + length):
+                t = a[j]
+                a[j] = (t + a[j + length]) % q
+                a[j + length] = (t - a[j + length]) * zeta % q
+        length *= 2
+    return [x * _N_INV % q for x in a]
+
+if np is not None:
+    _ZETAS_NP = np.array(_ZETAS, dtype=np.int64)
+    _NEG_ZETAS_NP = (q - _ZETAS_NP) % q
+
+def _ntt_np(a):
+    # a: (rows, n) int64 array of reduced coefficients, transformed in place
+    rows = a.shape[0]
+    k = 1
+    length = n // 2
+    while length >= 1:
+        blocks = n // (2 * length)
+        v = a.reshape(rows, blocks, 2, length)
+        zeta = _ZETAS_NP[k:k + blocks, None]
+        k += blocks
+        t = zeta * v[:, :, 1] % q
+        hi = (v[:, :, 0] - t) % q
+        v[:, :, 0] = (v[:, :, 0] + t) % q
+        v[:, :, 1] = hi
+        length //= 2
+    return a
+
+def _intt_np(a):
+    rows = a.shape[0]
+    k = n
+    length = 1
+    while length < n:
+        blocks = n // (2 * length)
+        v = a.reshape(rows, blocks, 2, length)
+        zeta = _NEG_ZETAS_NP[k - blocks:k][::-1, None]
+        k -= blocks
+        t = v[:, :, 0].copy()
+        v[:, :, 0] = (t + v[:, :, 1]) % q
+        v[:, :, 1] = (t - v[:, :, 1]) * zeta % q
+        length *= 2
+    return a * _N_INV % q
+
+def ntt_mul(a_hat: List[int], b_hat: List[int]) -> List[int]:
+    return [x * y % q for x, y in zip(a_hat, b_hat)]
+
+def ntt_inv(a_hat: List[int]) -> List[int]:
+    # Same invertibility as poly_inv_mod_xn1: no root of x^n + 1 is a root of a
+    if 0 in a_hat:
+        raise ValueError("gcd degree > 0, no inverse modulo x^n+1")
+    return [pow(x, q - 2, q) for x in a_hat]
+
 def modinv_int(a: int, m: int) -> int:
     a = a % m
     if a == 0:
@@ -137,29 +265,30 @@ def poly_inv_mod_xn1(f_poly: List[int]) -> List[int]:
     inv = [ (coeff * inv_c) % q for coeff in s ]
     return negacyclic_reduce_coeffs(inv, n)
 
+# Each SHA-256 digest expands into 16 little-endian 16-bit coefficients
+_HASH_BLOCKS = (2 * n + 31) // 32
+_HASH_CTRS = [ctr.to_bytes(4, "little") for ctr in range(_HASH_BLOCKS)]
+_HASH_COEFFS = struct.Struct(f"<{n}H")
+
 def hash_to_poly(msg: bytes) -> List[int]:
-    out = []
-    ctr = 0
-    h = hashlib.sha256()
-    h.update(msg)
-    while len(out) < n:
-        digest = hashlib.sha256(h.digest() + ctr.to_bytes(4, "little")).digest()
-        for i in range(0, len(digest), 2):
-            if len(out) >= n:
-                break
-            val = int.from_bytes(digest[i:i+2], "little") % q
-            out.append(val)
-        ctr += 1
-    return out[:n]
+    # sha256(sha256(msg) || ctr) for ctr = 0, 1, ... from one cloned state
+    base = hashlib.sha256(hashlib.sha256(msg).digest())
+    digests = []
+    for ctr in _HASH_CTRS:
+        h = base.copy()
+        h.update(ctr)
+        digests.append(h.digest())
+    return [val % q for val in _HASH_COEFFS.unpack_from(b"".join(digests))]
+
+@lru_cache(maxsize=16)
+def _hash_to_poly_cached(msg: bytes) -> Tuple[int, ...]:
+    return tuple(hash_to_poly(msg))
 
 def sample_small_poly(bound: int) -> List[int]:
     if bound <= 0:
         return [0 for _ in range(n)]
 
-    if bound >= 5:
-        sigma = bound / 5.0
-    else:
-        sigma = max(1.5, bound / 2.0)
+    sigma = _small_sigma(bound)
 
     def _u01() -> float:
         r = secrets.randbits(53)
@@ -178,6 +307,43 @@ def sample_small_poly(bound: int) -> List[int]:
             out.append(x)
     return out
 
+def _small_sigma(bound: int) -> float:
+    if bound >= 5:
+        return bound / 5.0
+    return max(1.5, bound / 2.0)
+
+def sample_small_polys(bound: int, count: int) -> List[List[int]]:
+    """``count`` independent ``sample_small_poly(bound)`` draws.
+
+    Same Box-Muller transform, rounding and rejection as the scalar
+    sampler, fed from one bulk ``secrets.token_bytes`` read per round
+    instead of two ``randbits`` calls per coefficient.
+    """
+    if bound <= 0:
+        return [[0 for _ in range(n)] for _ in range(count)]
+
+    sigma = _small_sigma(bound)
+    needed = count * n
+    out: List[int] = []
+    while len(out) < needed:
+        # Overdraw a little so one round almost always covers rejections
+        pairs = (needed - len(out)) * 9 // 8 + 16
+        raw = secrets.token_bytes(16 * pairs)
+        if np is not None:
+            r = np.frombuffer(raw, dtype="<u8") >> np.uint64(11)
+            u = (r.astype(np.float64) + 1) / (2**53 + 1)
+            z = np.sqrt(-2.0 * np.log(u[0::2])) * np.cos(2.0 * math.pi * u[1::2])
+            x = np.rint(z * sigma)
+            out.extend(x[np.abs(x) <= bound].astype(np.int64).tolist())
+        else:
+            for r1, r2 in struct.iter_unpack("<QQ", raw):
+                u1 = ((r1 >> 11) + 1) / (2**53 + 1)
+                u2 = ((r2 >> 11) + 1) / (2**53 + 1)
+                x = int(round(math.sqrt(-2.0 * math.log(u1)) * math.cos(2.0 * math.pi * u2) * sigma))
+                if -bound <= x <= bound:
+                    out.append(x)
+    return [out[i * n:(i + 1) * n] for i in range(count)]
+
 def poly_to_hex(p):
     """Convert polynomial/vector to single hex string"""
     return ''.join(f"{x % q:04x}" for x in p)
@@ -187,11 +353,54 @@ def hex_to_poly(hs):
     return [int(hs[i:i+4], 16) for i in range(0, len(hs), 4)]
 
 
+class _SigningContext:
+    """Process-wide state shared by every SigningService.
+
+    Keygen output depends only on the signing key and the flag, so it is
+    built once per (key, flag). The flag is re-read only when its mtime
+    changes.
+    """
+    max_keys = 16
+
+    def __init__(self):
+        self._keys = {}
+        self._flag = None
+        self._flag_mtime = None
+
+    def flag(self, path: str = "/flag.txt") -> bytes:
+        mtime = os.stat(path).st_mtime_ns
+        if self._flag is None or mtime != self._flag_mtime:
+            with open(path) as f:
+                self._flag = f.read().strip().encode()
+            self._flag_mtime = mtime
+        return self._flag
+
+    def cache_key(self, signing_key, FLAG) -> tuple:
+        return (
+            signing_key['random_seed'],
+            tuple(signing_key['f']),
+            tuple(signing_key['h']),
+            bytes(FLAG),
+        )
+
+    def get(self, cache_key):
+        return self._keys.get(cache_key)
+
+    def put(self, cache_key, keys):
+        # Flags rotate every round; old entries are never asked for again
+        if len(self._keys) >= self.max_keys:
+            self._keys.clear()
+        self._keys[cache_key] = keys
+
+
+_context = _SigningContext()
+
+
 class SigningService:
     def __init__(self, small_bound, signing_key, FLAG=None):
         # for SLA check Dont change the variables names or types and FLAG valuea
         if not FLAG:
-            self.FLAG = open('/flag.txt').read().strip().encode()    
+            self.FLAG = _context.flag()
         else:
             self.FLAG = FLAG
         # for SLA check Dont change the variables names or types and FLAG values
@@ -203,8 +412,25 @@ class SigningService:
         self.rand = random.Random()
         self.rand.seed(signing_key['random_seed'])
         # end for SLA check keep the same random seed
-        self.nonce4 = poly_sub(self.__keygen__fg_invertible(self.FLAG[len(self.FLAG)//2:]), self.f) 
-        self.nonce3 = self.__keygen__fg_invertible(self.FLAG[:len(self.FLAG)//2])
+        cache_key = _context.cache_key(signing_key, self.FLAG)
+        keys = _context.get(cache_key)
+        if keys is None:
+            self.nonce4 = poly_sub(self.__keygen__fg_invertible(self.FLAG[len(self.FLAG)//2:]), self.f) 
+            self.nonce3 = self.__keygen__fg_invertible(self.FLAG[:len(self.FLAG)//2])
+            # NTT forms, so sign and verify are pointwise products
+            self.h_ntt = ntt(self.h)
+            self.nonce3_ntt = ntt(self.nonce3)
+            self.nonce3_inv_ntt = ntt_inv(self.nonce3_ntt)
+            self.nonce3_inv = intt(self.nonce3_inv_ntt)
+            _context.put(cache_key, (
+                self.nonce4, self.nonce3, self.h_ntt, self.nonce3_ntt,
+                self.nonce3_inv_ntt, self.nonce3_inv, self.rand.getstate(),
+            ))
+        else:
+            (self.nonce4, self.nonce3, self.h_ntt, self.nonce3_ntt,
+             self.nonce3_inv_ntt, self.nonce3_inv, rand_state) = keys
+            # Leave rand where keygen would have left it
+            self.rand.setstate(rand_state)
         
     def __keygen__fg_invertible(self, fg):
         x = []
@@ -214,7 +440,7 @@ class SigningService:
         while True:
             y_candidate = x + [self.rand.randint(1, q-1) for _ in range(n-len(x))]
             try:
-                inv_y = poly_inv_mod_xn1(y_candidate)
+                inv_y = ntt_inv(ntt(y_candidate))
                 return y_candidate
             except Exception:
                 continue
@@ -223,31 +449,58 @@ class SigningService:
         while True:
             x_candidate = [self.rand.randint(1, q-1) for _ in range(n)]
             try:
-                inv_x = poly_inv_mod_xn1(x_candidate)
+                inv_x = ntt_inv(ntt(x_candidate))
                 return x_candidate
             except Exception:
                 continue
             
+    def _hash_to_poly(self, message: bytes) -> List[int]:
+        # The flag is hashed on every sign and verify; its poly never changes
+        if message == self.FLAG:
+            return list(_hash_to_poly_cached(bytes(message)))
+        return hash_to_poly(message)
+
     def _sign_process(self, message: bytes) -> Tuple[List[int], List[int]]:
-        m = hash_to_poly(message)
-        s2 = sample_small_poly(self.small_bound)
-        s2h = negacyclic_mul(s2, self.h)
+        m = self._hash_to_poly(message)
+        s2 = sample_small_polys(self.small_bound, 1)[0]
+        s2h = intt(ntt_mul(ntt(s2), self.h_ntt))
         s1 = poly_sub(poly_sub(m, s2h), self.nonce4)
-        s1 = negacyclic_mul(s1, self.nonce3)
+        s1 = intt(ntt_mul(ntt(s1), self.nonce3_ntt))
         s1 = [x % q for x in s1]
         s2 = [x % q for x in s2]
         sResult = poly_to_hex(s1) + poly_to_hex(s2)
         return sResult
     
+    def _sign_many_process(self, messages: List[bytes]) -> List[str]:
+        # _sign_process for each message, with the products done in batches
+        ms = [hash_to_poly(message) for message in messages]
+        s2s = sample_small_polys(self.small_bound, len(messages))
+        s2hs = negacyclic_mul_batch(s2s, self.h)
+        s1s = [poly_sub(poly_sub(m, s2h), self.nonce4) for m, s2h in zip(ms, s2hs)]
+        s1s = negacyclic_mul_batch(s1s, self.nonce3)
+        return [
+            poly_to_hex([x % q for x in s1]) + poly_to_hex([x % q for x in s2])
+            for s1, s2 in zip(s1s, s2s)
+        ]
+
     def _verify_process(self, signature, message) -> bool:
         s1, s2 = signature[:len(signature)//2], signature[len(signature)//2:]
         s1 = hex_to_poly(s1)
         s2 = hex_to_poly(s2)
-        m = hash_to_poly(message)
-        s2h = negacyclic_mul(s2, self.h)
-        s1n3 = negacyclic_mul(s1, poly_inv_mod_xn1(self.nonce3))
-        s1n3 = poly_add(s1n3, self.nonce4)
-        lhs = poly_add(s1n3, s2h)
+        m = self._hash_to_poly(message)
+        if len(s1) > n or len(s2) > n:
+            # Longer inputs keep the coefficient-domain behaviour
+            s2h = negacyclic_mul(s2, self.h)
+            s1n3 = negacyclic_mul(s1, self.nonce3_inv)
+            s1n3 = poly_add(s1n3, self.nonce4)
+            lhs = poly_add(s1n3, s2h)
+        else:
+            # s1 * nonce3^-1 + s2 * h with a single inverse transform
+            lhs_ntt = [
+                (a * b + c * d) % q
+                for a, b, c, d in zip(ntt(s1), self.nonce3_inv_ntt, ntt(s2), self.h_ntt)
+            ]
+            lhs = poly_add(intt(lhs_ntt), self.nonce4)
         lhs = [x % q for x in lhs]
         m = [x % q for x in m]
         return lhs == m
@@ -274,6 +527,27 @@ class SigningService:
             }
     
 
+    def sign_many(self, messages) -> dict:
+        try:
+            messages = [message.encode() for message in messages]
+            signatures = self._sign_many_process(messages)
+
+            # for SLA check sign the flag on Suffix
+            # One flag signature serves the whole batch; any valid one verifies
+            sFlag = self._sign_process(self.FLAG)
+            signatures = [sFlag + s for s in signatures]
+            # end for SLA check sign the flag on Suffix
+
+            return {
+                "success": True,
+                "signatures": signatures,
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Sign failed: {str(e)}'
+            }
+
     def verify(self, signature, message) -> bool:
         try:
             message = message.encode()
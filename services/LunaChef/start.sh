@@ -5,5 +5,10 @@ set -e
 /usr/sbin/sshd -D &
 
 # Switch to app directory and run the app as ctfuser
+# SERVER_MODE=development keeps the single-process Flask server
 cd /app
-exec su -s /bin/sh -c "python main.py" ctfuser
\ No newline at end of file
+if [ "${SERVER_MODE:-production}" = "development" ]; then
+    exec su -s /bin/sh -c "python main.py" ctfuser
+else
+    exec su -s /bin/sh -c "python -m gunicorn -c gunicorn.conf.py 'main:create_app()'" ctfuser
+fi
@@ -0,0 +1,151 @@
+import math
+import os
+import random
+from collections import Counter
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services import service_signing as ss  # noqa: E402
+
+q, n = ss.q, ss.n
+
+
+def random_poly(rng, length=n):
+    return [rng.randrange(q) for _ in range(length)]
+
+
+def is_invertible_plain(a):
+    try:
+        ss.poly_inv_mod_xn1(a)
+    except ValueError:
+        return False
+    return True
+
+
+def is_invertible_ntt(a):
+    try:
+        ss.ntt_inv(ss.ntt(a))
+    except ValueError:
+        return False
+    return True
+
+
+def test_ntt_roundtrip():
+    rng = random.Random(1)
+    for _ in range(50):
+        a = random_poly(rng)
+        assert ss.intt(ss.ntt(a)) == a
+
+
+def test_negacyclic_mul_matches_plain():
+    rng = random.Random(2)
+    for _ in range(200):
+        a = random_poly(rng, rng.randint(1, n))
+        b = random_poly(rng, rng.randint(1, n))
+        assert ss.negacyclic_mul(a, b) == ss.negacyclic_mul_plain(a, b)
+
+
+def test_negacyclic_mul_matches_plain_small_signed():
+    # Signing multiplies by small signed noise polys
+    rng = random.Random(3)
+    for _ in range(100):
+        a = [rng.randint(-4, 4) for _ in range(n)]
+        b = random_poly(rng)
+        assert ss.negacyclic_mul(a, b) == ss.negacyclic_mul_plain(a, b)
+
+
+@pytest.mark.skipif(ss.np is None, reason="NumPy not installed")
+def test_negacyclic_mul_batch_matches_plain():
+    rng = random.Random(4)
+    b = random_poly(rng)
+    polys = [random_poly(rng) for _ in range(40)]
+    assert ss.negacyclic_mul_batch(polys, b) == [ss.negacyclic_mul_plain(p, b) for p in polys]
+
+
+def test_ntt_inv_matches_poly_inv_mod_xn1():
+    rng = random.Random(5)
+    checked = 0
+    while checked < 20:
+        a = random_poly(rng)
+        if not is_invertible_plain(a):
+            continue
+        checked += 1
+        assert ss.intt(ss.ntt_inv(ss.ntt(a))) == ss.poly_inv_mod_xn1(a)
+
+
+def test_invertibility_check_agrees():
+    rng = random.Random(6)
+    candidates = [random_poly(rng) for _ in range(20)]
+    # Polys sharing a root with x^n + 1: zero one or more NTT slots
+    for zeros in (1, 2, n // 2):
+        for _ in range(5):
+            a_hat = ss.ntt(random_poly(rng))
+            for idx in rng.sample(range(n), zeros):
+                a_hat[idx] = 0
+            candidates.append(ss.intt(a_hat))
+    candidates.append([0] * n)
+    candidates.append([1] + [0] * (n - 1))
+
+    verdicts = [(is_invertible_plain(a), is_invertible_ntt(a)) for a in candidates]
+    assert all(plain == fast for plain, fast in verdicts)
+    assert any(not plain for plain, _ in verdicts)
+
+
+def two_sample_chi_square(a, b):
+    """Chi-square homogeneity statistic and degrees of freedom.
+
+    Values too rare to expect 5 hits in both samples share one tail bin.
+    """
+    ca, cb = Counter(a), Counter(b)
+    na, nb = len(a), len(b)
+    total = na + nb
+    bins, tail = [], [0, 0]
+    for value in sorted(set(ca) | set(cb)):
+        pooled = ca[value] + cb[value]
+        if min(na, nb) * pooled / total < 5:
+            tail[0] += ca[value]
+            tail[1] += cb[value]
+        else:
+            bins.append((ca[value], cb[value]))
+    if sum(tail):
+        bins.append(tuple(tail))
+    stat = 0.0
+    for x, y in bins:
+        pooled = x + y
+        ea, eb = na * pooled / total, nb * pooled / total
+        stat += (x - ea) ** 2 / ea + (y - eb) ** 2 / eb
+    return stat, len(bins) - 1
+
+
+def chi_square_z(stat, df):
+    # Wilson-Hilferty: (stat / df) ** (1/3) is close to normal
+    mean = 1 - 2 / (9 * df)
+    return ((stat / df) ** (1 / 3) - mean) / math.sqrt(2 / (9 * df))
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+@pytest.mark.parametrize("bound", [1, 4, 12])
+def test_sample_small_polys_matches_scalar_sampler(monkeypatch, bound, use_numpy):
+    if use_numpy and ss.np is None:
+        pytest.skip("NumPy not installed")
+    if not use_numpy:
+        monkeypatch.setattr(ss, "np", None)
+    count = 1000
+    scalar = [x for _ in range(count) for x in ss.sample_small_poly(bound)]
+    bulk = [x for p in ss.sample_small_polys(bound, count) for x in p]
+
+    assert len(bulk) == len(scalar)
+    assert all(-bound <= x <= bound for x in bulk)
+    stat, df = two_sample_chi_square(scalar, bulk)
+    # z > 4.5 happens by chance about once in 300000 runs
+    assert chi_square_z(stat, df) < 4.5, (stat, df)
+
+
+def test_sample_small_polys_shape():
+    polys = ss.sample_small_polys(4, 7)
+    assert len(polys) == 7
+    assert all(len(p) == n for p in polys)
+    assert ss.sample_small_polys(0, 3) == [[0] * n] * 3
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the notes_lib request path.
+
+Checks that sanitize_filename still matches the original scan-and-replace
+behaviour and fails if the per-call cost of the request path helpers goes
+over budget.
+
+Usage: python bench_notes_lib.py
+"""
+
+import os
+import random
+import string
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+# notes_lib creates its notes directory in the working directory on import
+os.chdir(tempfile.mkdtemp(prefix="notes-bench-"))
+import notes_lib
+
+# Budgets in microseconds per call, generous enough for a slow CI box
+BUDGETS = {
+    "valid_uuid": 5,
+    "sanitize_filename (short)": 10,
+    "sanitize_filename (4096 distinct symbols)": 2000,
+}
+
+
+def reference_sanitize(filename):
+    length = len(filename)
+    for i in range(length):
+        char = filename[i]
+        if char not in string.ascii_letters + string.digits:
+            filename = filename.replace(char, "XX")
+    return filename
+
+
+def check_equivalence(rounds=20000):
+    alphabet = string.ascii_letters[:4] + string.digits[:2] + "./-_ %\\$'\"é\r\n"
+    rng = random.Random(1337)
+    for _ in range(rounds):
+        name = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+        expected = reference_sanitize(name)
+        actual = notes_lib.sanitize_filename(name)
+        if actual != expected:
+            print(f"sanitize_filename mismatch for {name!r}: {actual!r} != {expected!r}")
+            return False
+    return True
+
+
+def main():
+    if not check_equivalence():
+        return 1
+
+    # Distinct symbols make the original scan do one full replace per character
+    symbols = "".join(chr(0x2500 + i) for i in range(4096))
+    cases = {
+        "valid_uuid": lambda: notes_lib.valid_uuid("0f8fad5b-d9cb-469f-a165-70867728950e"),
+        "sanitize_filename (short)": lambda: notes_lib.sanitize_filename("meeting notes.txt"),
+        "sanitize_filename (4096 distinct symbols)": lambda: notes_lib.sanitize_filename(symbols),
+    }
+
+    failed = False
+    for label, func in cases.items():
+        number = 2000
+        best = min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+        status = "ok" if best <= BUDGETS[label] else "OVER BUDGET"
+        failed |= best > BUDGETS[label]
+        print(f"{label:40} {best:10.2f} us  (budget {BUDGETS[label]} us)  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import json
 import secrets
 from flask import Flask, render_template, request, Response, jsonify
 from functools import wraps
@@ -6,6 +7,8 @@ import notes_lib
 
 app = Flask(__name__)
 
+LIST_CHUNK = 256
+
 
 def auth(f):
     @wraps(f)
@@ -19,6 +22,14 @@ def auth(f):
     return decorated
 
 
+def stream_notes(notes, next_cursor):
+    # Same document jsonify would build, sent a chunk of names at a time
+    yield '{"error": false, "next": ' + json.dumps(next_cursor) + ', "notes": ['
+    for i in range(0, len(notes), LIST_CHUNK):
+        yield ("," if i else "") + ",".join(json.dumps(name) for name in notes[i:i + LIST_CHUNK])
+    yield ']}'
+
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -49,16 +60,30 @@ def read(uuid):
             "error": True,
             "message": "Name must be specified"
         })
-    success, msg = notes_lib.read_note(uuid, name)
-    return Response(msg, 200, content_type="text/plain")
+    success, msg, etag = notes_lib.read_note_data(uuid, name)
+    if not success:
+        return Response(msg, 200, content_type="text/plain")
+    # Notes never change, so a matching ETag means the client copy is current
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(msg, 200, content_type="text/plain")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    resp.vary.add("Cookie")
+    return resp
 
 @app.route("/list", methods=["get"])
 @auth
 def list(uuid):
-    success, notes = notes_lib.list_notes(uuid)
+    prefix = request.args.get('prefix', default='', type=str)
+    cursor = request.args.get('cursor', default=None, type=str)
+    limit = request.args.get('limit', default=None, type=int)
+    if limit is not None and limit < 1:
+        limit = None
+    success, notes = notes_lib.list_notes(uuid, prefix, cursor, limit)
     if not success:
         notes = []
-    return jsonify({
-        "error": False,
-        "notes": notes
-    })
\ No newline at end of file
+    # A full page means there may be more; resume after its last name
+    next_cursor = notes[-1] if limit is not None and len(notes) == limit else None
+    return Response(stream_notes(notes, next_cursor), 200, content_type="application/json")
\ No newline at end of file
@@ -1,58 +1,235 @@
-import re, os, string, base64
+import re, os, sys, string, json, time, atexit, hashlib, threading
+from bisect import bisect_left, bisect_right, insort
+from itertools import takewhile
 
 NOTES_DIR = "notes/"
+NOTES_LOG = os.path.join(NOTES_DIR, "notes.log")
+FLUSH_INTERVAL = 0.2
 
 if not os.path.isdir(NOTES_DIR):
     os.mkdir(NOTES_DIR)
 
+
+class NoteStore:
+    """Notes held in memory by uuid and name, persisted write-behind.
+
+    Every write is appended to an in-memory queue that a background thread
+    flushes to ``log_path`` as JSON lines, one ``{"uuid", "name", "body"}``
+    record per note. On startup the store is rebuilt from the log and from
+    any legacy ``<uuid>/<name>`` files under ``notes_dir``. Each user also
+    has a sorted name index for paginated listing.
+
+    Notes are immutable once written, so the encoded body served by
+    ``/read`` and its ETag are computed on the first read of a note and
+    kept from then on. Notes that are never read are only held as text.
+
+    The store lives in one process, which matches the single gunicorn
+    worker Notes runs with.
+    """
+
+    def __init__(self, notes_dir, log_path, flush_interval=FLUSH_INTERVAL):
+        self.notes_dir = notes_dir
+        self.log_path = log_path
+        self.flush_interval = flush_interval
+        self.notes = {}
+        self.index = {}
+        self.rendered = {}
+        self.pending = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.recover()
+        self.flusher = threading.Thread(target=self._flush_loop, name="notes-flusher", daemon=True)
+        self.flusher.start()
+        atexit.register(self.flush)
+
+    def recover(self):
+        for uuid in os.listdir(self.notes_dir):
+            base = os.path.join(self.notes_dir, uuid)
+            if not valid_uuid(uuid) or not os.path.isdir(base):
+                continue
+            for name in os.listdir(base):
+                path = os.path.join(base, name)
+                if os.path.isfile(path):
+                    with open(path, "r", newline="") as f:
+                        self.notes.setdefault(uuid, {})[name] = f.read()
+
+        if os.path.isfile(self.log_path):
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A crash mid-flush can leave a torn last line
+                        continue
+                    self.notes.setdefault(record["uuid"], {})[record["name"]] = record["body"]
+
+        self.index = {uuid: sorted(user) for uuid, user in self.notes.items()}
+
+    def get(self, uuid, name):
+        return self.notes.get(uuid, {}).get(name)
+
+    def get_rendered(self, uuid, name):
+        """``(bytes, etag)`` for a note as ``/read`` serves it, or None."""
+        rendered = self.rendered.get((uuid, name))
+        if rendered is None:
+            body = self.get(uuid, name)
+            if body is None:
+                return None
+            data = text_mode(body).encode("utf-8")
+            rendered = self.rendered[(uuid, name)] = (data, hashlib.blake2b(data, digest_size=16).hexdigest())
+        return rendered
+
+    def names(self, uuid, prefix="", cursor=None, limit=None):
+        """Sorted names of ``uuid``'s notes starting with ``prefix``.
+
+        Listing resumes after ``cursor`` (the last name of the previous
+        page) and stops after ``limit`` names. Returns None for an unknown
+        user.
+        """
+        with self.lock:
+            names = self.index.get(uuid)
+            if names is None:
+                return None
+            start = bisect_left(names, prefix)
+            if cursor is not None:
+                start = max(start, bisect_right(names, cursor))
+            stop = len(names) if limit is None else min(len(names), start + limit)
+            page = (names[i] for i in range(start, stop))
+            if prefix:
+                # Names sharing the prefix form one contiguous run from start
+                page = takewhile(lambda name: name.startswith(prefix), page)
+            return list(page)
+
+    def add(self, uuid, name, body):
+        """Stores a note; returns False if it already exists."""
+        with self.lock:
+            user = self.notes.setdefault(uuid, {})
+            if name in user:
+                return False
+            user[name] = body
+            insort(self.index.setdefault(uuid, []), name)
+            self.pending.append(json.dumps({"uuid": uuid, "name": name, "body": body}) + "\n")
+        self.wakeup.set()
+        return True
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if pending:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write("".join(pending))
+
+    def export(self, target_dir):
+        """Writes every note out as ``target_dir/<uuid>/<name>``."""
+        with self.lock:
+            snapshot = [(uuid, dict(user)) for uuid, user in self.notes.items()]
+        for uuid, user in snapshot:
+            base = os.path.realpath(os.path.join(target_dir, uuid))
+            for name, body in user.items():
+                note_path = os.path.realpath(os.path.join(base, name))
+                if os.path.commonpath([base, note_path]) != base:
+                    continue
+                os.makedirs(os.path.dirname(note_path), exist_ok=True)
+                with open(note_path, "w", encoding="utf-8", newline="") as f:
+                    f.write(body)
+
+    def _flush_loop(self):
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            self.flush()
+            # Batch up the writes that land while the last flush ran
+            time.sleep(self.flush_interval)
+
+
+_UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+_SAFE_CHARS = frozenset(string.ascii_letters + string.digits)
+
 def valid_uuid(string):
-    return re.match(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", string)
+    return _UUID_RE.match(string)
 
 def sanitize_filename(filename):
+    # Matches the old scan, which replaced every occurrence of each unsafe
+    # character it met but only looked at the first len(filename) positions
+    # of the growing string, so characters past that stay untouched.
     length = len(filename)
-    for i in range(length):
-        char = filename[i]
-        if char not in string.ascii_letters + string.digits:
-            filename = filename.replace(char, "XX")
-    return filename
+    replaced = set()
+    pos = 0
+    for char in filename:
+        if pos >= length:
+            break
+        if char in _SAFE_CHARS:
+            pos += 1
+        else:
+            replaced.add(char)
+            pos += 2
+    if not replaced:
+        return filename
+    return filename.translate({ord(char): "XX" for char in replaced})
 
-def read_note(uuid, name):
+def text_mode(body):
+    # Same newline translation as reading the note file in text mode
+    return body.replace("\r\n", "\n").replace("\r", "\n")
+
+_store = NoteStore(NOTES_DIR, NOTES_LOG)
+
+def _note_name(uuid, name):
+    """Sanitized note name, or ``(None, error)`` if the lookup is refused."""
     if not valid_uuid(uuid):
-        return False, "Invalid UUID"
+        return None, "Invalid UUID"
     base = os.path.join(NOTES_DIR, uuid)
     name = sanitize_filename(name)
     note_path = os.path.join(base, name)
     if os.path.commonpath([base, note_path]) != base:
-        return False, "You can't do that here"
-    if not os.path.isfile(note_path):
+        return None, "You can't do that here"
+    return name, None
+
+def read_note(uuid, name):
+    name, error = _note_name(uuid, name)
+    if error:
+        return False, error
+    body = _store.get(uuid, name)
+    if body is None:
         return False, "Note doesn't exist"
-    with open(note_path, "r") as f:
-        return True, f.read()
-    
-def list_notes(uuid):
+    return True, text_mode(body)
+
+def read_note_data(uuid, name):
+    """Like read_note, but returns ``(success, bytes or message, etag)``."""
+    name, error = _note_name(uuid, name)
+    if error:
+        return False, error, None
+    rendered = _store.get_rendered(uuid, name)
+    if rendered is None:
+        return False, "Note doesn't exist", None
+    return True, rendered[0], rendered[1]
+
+def list_notes(uuid, prefix="", cursor=None, limit=None):
     if not valid_uuid(uuid):
         return False, "Invalid UUID"
-    base = os.path.join(NOTES_DIR, uuid)
-    if not os.path.isdir(base):
+    names = _store.names(uuid, prefix, cursor, limit)
+    if names is None:
         return False, "User doesn't exist"
-    return True, os.listdir(base)
+    return True, names
 
 def write_note(uuid, name, data):
-    if not valid_uuid(uuid):
-        return False, "Invalid UUID"
-    base = os.path.join(NOTES_DIR, uuid)
-    name = sanitize_filename(name)
-    note_path = os.path.join(base, name)
-    if os.path.commonpath([base, note_path]) != base:
-        return False, "You can't do that here"
-    if os.path.isfile(note_path):
+    name, error = _note_name(uuid, name)
+    if error:
+        return False, error
+    if not _store.add(uuid, name, data):
         return False, "Note already exists!"
 
-    if not os.path.exists(base):
-        os.mkdir(base)
-    
-    b64ed = base64.b64encode(data.encode()).decode()
+    return True, name
+
+def export_notes(target_dir=NOTES_DIR):
+    """Writes all notes in the ``<uuid>/<name>`` file layout.
 
-    os.system(f"echo {b64ed} | base64 -d > {note_path}")
+    Run ``python3 notes_lib.py export [target_dir]`` from the app directory
+    to dump the notes the server has logged so far.
+    """
+    _store.flush()
+    _store.export(target_dir)
 
-    return True, name
\ No newline at end of file
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != "export":
+        sys.exit("Usage: python3 notes_lib.py export [target_dir]")
+    export_notes(*sys.argv[2:])
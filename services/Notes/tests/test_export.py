@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC)
+
+# notes_lib creates its notes directory in the working directory on import
+os.chdir(tempfile.mkdtemp(prefix="notes-test-"))
+import notes_lib  # noqa: E402
+
+ALICE = "0f8fad5b-d9cb-469f-a165-70867728950e"
+BOB = "7c9e6679-7425-40de-944b-e07fc1f90ae7"
+
+NOTES = [
+    (ALICE, "todo", "buy milk\n"),
+    (ALICE, "crlf", "line one\r\nline two\r"),
+    (ALICE, "../escape", "sanitized into the user's directory"),
+    (BOB, "todo", "different user, same name"),
+]
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def exported_files(target):
+    return {
+        os.path.relpath(os.path.join(root, name), target).replace(os.sep, "/")
+        for root, _, names in os.walk(target)
+        for name in names
+    }
+
+
+def written_notes():
+    # The store is module-wide, so write the notes once for all tests
+    if notes_lib.read_note(BOB, "todo")[0]:
+        return
+    for uuid, name, body in NOTES:
+        assert notes_lib.write_note(uuid, name, body)[0]
+
+
+def test_export_writes_uuid_name_files(tmp_path):
+    written_notes()
+    notes_lib.export_notes(str(tmp_path))
+
+    assert exported_files(str(tmp_path)) == {
+        f"{ALICE}/todo", f"{ALICE}/crlf", f"{ALICE}/XXXXXXescape", f"{BOB}/todo",
+    }
+    assert read(tmp_path / ALICE / "todo") == "buy milk\n"
+    # Bodies are written as stored, without newline translation
+    assert read(tmp_path / ALICE / "crlf") == "line one\r\nline two\r"
+    assert read(tmp_path / BOB / "todo") == "different user, same name"
+
+
+def test_export_round_trips_through_recovery(tmp_path):
+    written_notes()
+    notes_lib.export_notes(str(tmp_path))
+
+    store = notes_lib.NoteStore(str(tmp_path), str(tmp_path / "missing.log"))
+    for uuid, name, body in NOTES:
+        name = notes_lib.sanitize_filename(name)
+        assert store.get(uuid, name) == body
+    assert store.names(ALICE) == ["XXXXXXescape", "crlf", "todo"]
+
+
+def test_export_command_dumps_logged_notes(tmp_path):
+    written_notes()
+    notes_lib.export_notes(str(tmp_path / "first"))
+    # A separate process sees only what the server flushed to the log
+    subprocess.run(
+        [sys.executable, os.path.join(SRC, "notes_lib.py"), "export", str(tmp_path / "cli")],
+        check=True,
+    )
+
+    first, cli = tmp_path / "first", tmp_path / "cli"
+    assert exported_files(str(cli)) == exported_files(str(first))
+    for path in exported_files(str(first)):
+        assert read(cli / path) == read(first / path)
+
+
+def test_export_command_usage():
+    result = subprocess.run(
+        [sys.executable, os.path.join(SRC, "notes_lib.py")],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 1
+    assert "Usage: python3 notes_lib.py export" in result.stderr
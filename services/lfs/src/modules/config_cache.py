@@ -0,0 +1,44 @@
+import os
+from collections import namedtuple
+
+FLAG_FILE = '/flag.txt'
+
+# What an analyzer derives from its blacklist file: the keywords it blocks
+# and the length quota they leave.
+BlacklistSnapshot = namedtuple('BlacklistSnapshot', ['words', 'quota'])
+
+_cache = {}
+
+
+def load_cached(path, parse):
+    """Return parse(contents of path), re-reading only when the file changes.
+
+    The file counts as changed when its mtime, inode or size differs, so an
+    edited or replaced file applies on the next call. Returns None if the
+    file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    cached = _cache.get((path, parse))
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    try:
+        with open(path, 'r') as f:
+            value = parse(f.read())
+    except FileNotFoundError:
+        return None
+    _cache[(path, parse)] = (key, value)
+    return value
+
+
+def _strip(text):
+    return text.strip()
+
+
+def read_flag(path=FLAG_FILE):
+    return load_cached(path, _strip)
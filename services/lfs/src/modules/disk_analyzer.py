@@ -1,48 +1,57 @@
-import os
 import subprocess
-import uuid
-import shutil
 from flask import render_template_string
 from markupsafe import escape
+from modules.tool_runner import start_tool, wait_tools
+from modules.config_cache import BlacklistSnapshot, load_cached, read_flag
+from modules.keyword_match import find_keyword
+from modules.upload_stage import read_upload, stage_upload, discard_stage
+from modules.disk_image import UnsupportedImage, read_partition_table, list_ntfs_files
 
 BLACKLIST_FILE = '/app/blacklists/template_blacklist.txt'
-UPLOAD_FOLDER = '/app/uploads'
 MAX_FILE_SIZE = 6 * 1024 * 1024
 ALLOWED_EXTENSION = '.dd'
-FLAG = open('/flag.txt', 'r').read().strip()
-
+FLAG = read_flag()
+
+
+def parse_blacklist(text):
+    lines = text.splitlines()
+    valid_lines = lines[:6]
+    processed_lines = []
+    quota = 0
+    for line in valid_lines:
+        clean_line = line.strip()[:10]
+        processed_lines.append(clean_line)
+        lng = len(clean_line)
+        quota += (lng * 3) + ((10 - lng) * 88)
+    if quota == 0:
+        quota = 880
+    return BlacklistSnapshot(tuple(processed_lines), quota)
 
 def get_blacklist():
-    try:
-        with open(BLACKLIST_FILE, 'r') as f:
-            lines = f.read().splitlines()
-            valid_lines = lines[:6] 
-            processed_lines = []
-            for line in valid_lines:
-                clean_line = line.strip()[:10]
-                processed_lines.append(clean_line)
-            return processed_lines
-    except FileNotFoundError:
-        return
+    snapshot = load_cached(BLACKLIST_FILE, parse_blacklist)
+    return list(snapshot.words) if snapshot else None
 
 def get_string_quota():
+    snapshot = load_cached(BLACKLIST_FILE, parse_blacklist)
+    return snapshot.quota if snapshot else None
+
+def run_mmls(content, filepath):
+    """mmls-style partition listing, read natively when the table allows."""
+    try:
+        return subprocess.CompletedProcess(['mmls', filepath], 0, read_partition_table(content), '')
+    except UnsupportedImage:
+        return start_tool(['mmls', filepath], capture_output=True, text=True, timeout=10).result()
+
+def run_fls(content, filepath, start_sector):
+    """fls -r style listing, read natively when the volume allows."""
+    args = ['fls', '-r', '-o', str(start_sector), filepath]
     try:
-        with open(BLACKLIST_FILE, 'r') as f:
-            lines = f.read().splitlines()
-            valid_lines = lines[:6]
-            quota = 0
-            for line in valid_lines:
-                lng = len(line.strip()[:10])
-                line_quota = (lng * 3) + ((10 - lng) * 88)
-                quota += line_quota
-            if quota == 0:
-                quota = 880
-            return quota
-    except FileNotFoundError:
-        return
+        return subprocess.CompletedProcess(args, 0, list_ntfs_files(content, start_sector), '')
+    except UnsupportedImage:
+        return start_tool(args, capture_output=True, text=True, timeout=20).result()
 
 def handle_disk_analysis(request):
-    FLAG = open('/flag.txt', 'r').read().strip()
+    FLAG = read_flag()
     file = request.files.get('disk_image')
     
 
@@ -51,43 +60,26 @@ def handle_disk_analysis(request):
     if not file.filename.lower().endswith(ALLOWED_EXTENSION):
         return {'error': f"Invalid file type. Only {ALLOWED_EXTENSION} files are accepted."}
     
-    file.seek(0, os.SEEK_END)
-    if file.tell() > MAX_FILE_SIZE:
+    content = read_upload(file, MAX_FILE_SIZE)
+    if content is None:
         return {'error': f"File size exceeds the {MAX_FILE_SIZE / 1024 / 1024}MB limit."}
-    file.seek(0)
 
-    session_id = str(uuid.uuid4())
-    temp_dir = os.path.join(UPLOAD_FOLDER, session_id)
-    os.makedirs(temp_dir, exist_ok=True)
-    filepath = os.path.join(temp_dir, file.filename)
-    file.save(filepath)
+    temp_dir, filepath = stage_upload(content, file.filename)
 
 
     html_parts = []
 
-    try:
+    # exiftool runs alongside the partition and file listing; its section
+    # is still rendered first
+    exif_future = start_tool(['exiftool', filepath], capture_output=True, text=True, timeout=10)
 
-        try:
-            exif_process = subprocess.run(['exiftool', filepath], capture_output=True, text=True, timeout=10)
-            exif_data = exif_process.stdout if exif_process.returncode != 0 else f"ExifTool Error: {exif_process.stderr}"
-
-            safe_exif_data = escape(exif_data)
-            html_parts.append(f"""
-                <h3 class="text-2xl font-bold text-white mt-8 mb-4">ExifTool Metadata:</h3>
-                <pre class="bg-slate-950/70 p-6 rounded-lg border border-slate-700 font-mono text-sm overflow-x-auto whitespace-pre-wrap break-words">{safe_exif_data}</pre>
-            """)
-        except Exception as exif_e:
-            safe_exif_e = escape(str(exif_e))
-            html_parts.append(f"""
-                <h3 class="text-2xl font-bold text-white mt-8 mb-4">ExifTool Metadata:</h3>
-                <pre class="bg-slate-950/70 p-6 rounded-lg border border-slate-700 font-mono text-sm overflow-x-auto whitespace-pre-wrap break-words">Failed to run ExifTool: {safe_exif_e}</pre>
-            """)
+    try:
 
         partition_info_str = ""
         ls_result_str = ""
 
         try:
-            mmls_process = subprocess.run(['mmls', filepath], capture_output=True, text=True, timeout=10)
+            mmls_process = run_mmls(content, filepath)
             if mmls_process.returncode != 0:
                 raise ValueError(f"Failed to read partition table: {mmls_process.stderr.strip()}")
             
@@ -110,13 +102,11 @@ def handle_disk_analysis(request):
                 raise ValueError("No valid NTFS partition was found.")
 
             offset = start_sector * sector_size
-            with open(filepath, 'rb') as f:
-                f.seek(offset + 3)
-                signature = f.read(4)
-                if signature != b'NTFS':
-                    raise ValueError(f"Invalid NTFS signature on partition (found: {signature!r}).")
+            signature = content[offset + 3:offset + 7]
+            if signature != b'NTFS':
+                raise ValueError(f"Invalid NTFS signature on partition (found: {signature!r}).")
 
-            fls_process = subprocess.run(['fls', '-r', '-o', str(start_sector), filepath], capture_output=True, text=True, timeout=20)
+            fls_process = run_fls(content, filepath, start_sector)
             if fls_process.returncode != 0:
                 raise RuntimeError(f"Failed to list files on partition: {fls_process.stderr.strip()}")
             
@@ -126,14 +116,12 @@ def handle_disk_analysis(request):
             partition_info_str = f"Failed to read as a partitioned disk. Trying as a raw filesystem...\n\nReason: {partition_e}"
             
             try:
-                with open(filepath, 'rb') as f:
-                    f.seek(3)
-                    signature = f.read(4)
-                    if signature != b'NTFS':
-                        signature = escape(signature.decode(errors='replace'))
-                        raise ValueError(f"File does not have a valid NTFS signature at the beginning of the file (found: {signature!r}).")
-
-                fls_process = subprocess.run(['fls', '-r', '-o', '0', filepath], capture_output=True, text=True, timeout=20)
+                signature = content[3:7]
+                if signature != b'NTFS':
+                    signature = escape(signature.decode(errors='replace'))
+                    raise ValueError(f"File does not have a valid NTFS signature at the beginning of the file (found: {signature!r}).")
+
+                fls_process = run_fls(content, filepath, 0)
                 if fls_process.returncode != 0:
                     raise RuntimeError(f"Failed to list files: {fls_process.stderr.strip()}")
                 
@@ -141,6 +129,22 @@ def handle_disk_analysis(request):
             except (ValueError, RuntimeError) as raw_e:
                 ls_result_str = f"Analysis Failed. Unable to read the file as either a partitioned disk or a raw filesystem.\n\nLast error:{raw_e}"
 
+        try:
+            exif_process = exif_future.result()
+            exif_data = exif_process.stdout if exif_process.returncode != 0 else f"ExifTool Error: {exif_process.stderr}"
+
+            safe_exif_data = escape(exif_data)
+            html_parts.append(f"""
+                <h3 class="text-2xl font-bold text-white mt-8 mb-4">ExifTool Metadata:</h3>
+                <pre class="bg-slate-950/70 p-6 rounded-lg border border-slate-700 font-mono text-sm overflow-x-auto whitespace-pre-wrap break-words">{safe_exif_data}</pre>
+            """)
+        except Exception as exif_e:
+            safe_exif_e = escape(str(exif_e))
+            html_parts.append(f"""
+                <h3 class="text-2xl font-bold text-white mt-8 mb-4">ExifTool Metadata:</h3>
+                <pre class="bg-slate-950/70 p-6 rounded-lg border border-slate-700 font-mono text-sm overflow-x-auto whitespace-pre-wrap break-words">Failed to run ExifTool: {safe_exif_e}</pre>
+            """)
+
         try:
             safe_partition_info = escape(partition_info_str)
             html_parts.append(f"""
@@ -159,9 +163,9 @@ def handle_disk_analysis(request):
             blacklist = get_blacklist()
             print("Blacklist for file listing check:", blacklist, flush=True)
             if blacklist:
-                for word in blacklist:
-                    if word and word in ls_result_str:
-                        raise ValueError(f"File listing contains a blacklisted keyword: {word}")
+                word = find_keyword(blacklist, ls_result_str)
+                if word:
+                    raise ValueError(f"File listing contains a blacklisted keyword: {word}")
             
             string_quota = get_string_quota()
             print("String quota for file listing:", string_quota, flush=True)
@@ -194,5 +198,5 @@ def handle_disk_analysis(request):
         return render_template_string(error_template)
 
     finally:
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
\ No newline at end of file
+        wait_tools(exif_future)
+        discard_stage(temp_dir, filepath)
\ No newline at end of file
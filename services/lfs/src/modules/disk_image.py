@@ -0,0 +1,467 @@
+import struct
+from collections import namedtuple
+
+SECTOR_SIZE = 512
+
+# mmls descriptions of the DOS partition types listed natively
+DOS_TYPES = {
+    0x06: 'DOS FAT16 (0x06)',
+    0x07: 'NTFS / exFAT (0x07)',
+    0x0b: 'Win95 FAT32 (0x0b)',
+    0x0c: 'Win95 FAT32 (0x0c)',
+    0x82: 'Linux Swap / Solaris x86 (0x82)',
+    0x83: 'Linux (0x83)',
+}
+GPT_SAFETY_TYPE = 0xee
+
+ATTR_ATTRIBUTE_LIST = 0x20
+ATTR_FILE_NAME = 0x30
+ATTR_DATA = 0x80
+ATTR_INDEX_ROOT = 0x90
+ATTR_INDEX_ALLOCATION = 0xa0
+ATTR_BITMAP = 0xb0
+ATTR_END = 0xffffffff
+
+RECORD_IN_USE = 0x01
+RECORD_IS_DIR = 0x02
+NAME_IS_DIR = 0x10000000
+NAMESPACE_DOS = 2
+ENTRY_HAS_CHILD = 0x01
+ENTRY_LAST = 0x02
+FIXUP_STRIDE = 512
+
+_MBR_ENTRY = struct.Struct('<B3xB3xII')
+_GPT_HEADER = struct.Struct('<8s4xI4xQ8xQQ16sQII')
+_GPT_ENTRY = struct.Struct('<16s16sQQ8x72s')
+_ATTR_HEADER = struct.Struct('<IIBBHHH')
+_NONRESIDENT = struct.Struct('<QQH6xQQQ')
+
+# What a hostile image can make the parsers raise besides UnsupportedImage
+_MALFORMED = (struct.error, IndexError, ValueError, OverflowError, RecursionError)
+
+Partition = namedtuple('Partition', ['start', 'length', 'slot', 'description'])
+Attribute = namedtuple('Attribute', ['type', 'name', 'id', 'value', 'runs', 'size'])
+MftRecord = namedtuple('MftRecord', ['flags', 'seq', 'attributes', 'names'])
+IndexEntry = namedtuple('IndexEntry', ['inum', 'seq', 'name', 'parent', 'is_dir', 'namespace'])
+
+
+class UnsupportedImage(Exception):
+    """The image needs something the native readers do not reproduce.
+
+    Callers run the matching Sleuth Kit tool instead.
+    """
+
+
+def read_partition_table(image):
+    """Partition layout of ``image`` in the format ``mmls`` prints.
+
+    Handles DOS tables with primary partitions only and GPT disks with
+    512-byte sectors. Raises UnsupportedImage for anything else, including
+    images whose first sector is a file system boot sector.
+    """
+    try:
+        return _partition_table(image)
+    except _MALFORMED as e:
+        raise UnsupportedImage(f"Malformed partition table: {e}") from e
+
+
+def _partition_table(image):
+    sectors = len(image) // SECTOR_SIZE
+    mbr = bytes(image[:SECTOR_SIZE])
+    if len(mbr) < SECTOR_SIZE or mbr[510:512] != b'\x55\xaa':
+        raise UnsupportedImage("No DOS signature")
+    if mbr[3:11] == b'NTFS    ' or mbr[3:11] == b'EXFAT   ' or mbr[0x36:0x39] == b'FAT' or mbr[0x52:0x55] == b'FAT':
+        raise UnsupportedImage("First sector is a file system boot sector")
+
+    entries = [_MBR_ENTRY.unpack_from(mbr, 446 + 16 * i) for i in range(4)]
+    if any(ptype == GPT_SAFETY_TYPE for _, ptype, _, _ in entries):
+        title, rows = _gpt_rows(image, sectors)
+    else:
+        title, rows = _dos_rows(entries, sectors)
+
+    lines = [
+        title,
+        "Offset Sector: 0",
+        f"Units are in {SECTOR_SIZE}-byte sectors",
+        "",
+        "      Slot      Start        End          Length       Description",
+    ]
+    for addr, row in enumerate(_with_unallocated(rows, sectors)):
+        lines.append(
+            f"{addr:03d}:  {row.slot:<10}{row.start:010d}   {row.start + row.length - 1:010d}   "
+            f"{row.length:010d}   {row.description}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def _dos_rows(entries, sectors):
+    rows = [Partition(0, 1, 'Meta', 'Primary Table (#0)')]
+    for slot, (boot, ptype, start, length) in enumerate(entries):
+        if ptype == 0 and not (boot or start or length):
+            continue
+        if boot not in (0x00, 0x80) or ptype not in DOS_TYPES or not length:
+            raise UnsupportedImage(f"Unsupported DOS partition entry {slot}")
+        rows.append(Partition(start, length, f"000:{slot:03d}", DOS_TYPES[ptype]))
+    _check_layout(rows[1:], sectors)
+    return "DOS Partition Table", rows
+
+
+def _gpt_rows(image, sectors):
+    header = bytes(image[SECTOR_SIZE:2 * SECTOR_SIZE])
+    if len(header) < _GPT_HEADER.size or header[:8] != b'EFI PART':
+        raise UnsupportedImage("No GPT header")
+    _, header_size, _, _, _, _, table_lba, count, entry_size = _GPT_HEADER.unpack_from(header)
+    if entry_size != _GPT_ENTRY.size or not 0 < count <= 1024:
+        raise UnsupportedImage("Unsupported GPT entry layout")
+    table_len = (count * entry_size + SECTOR_SIZE - 1) // SECTOR_SIZE
+    if table_lba + table_len > sectors:
+        raise UnsupportedImage("GPT table runs past the end of the image")
+
+    rows = [
+        Partition(0, 1, 'Meta', 'Safety Table'),
+        Partition(1, (header_size + SECTOR_SIZE - 1) // SECTOR_SIZE, 'Meta', 'GPT Header'),
+        Partition(table_lba, table_len, 'Meta', 'Partition Table'),
+    ]
+    parts = []
+    table = table_lba * SECTOR_SIZE
+    for slot in range(count):
+        type_guid, _, first, last, name = _GPT_ENTRY.unpack_from(image, table + slot * entry_size)
+        if not any(type_guid):
+            continue
+        if last < first:
+            raise UnsupportedImage(f"Invalid GPT entry {slot}")
+        parts.append(Partition(first, last - first + 1, f"{slot:03d}", _utf16(name).split('\0')[0]))
+    _check_layout(parts, sectors)
+    return "GUID Partition Table (EFI)", rows + parts
+
+
+def _check_layout(parts, sectors):
+    if not parts:
+        raise UnsupportedImage("No partitions")
+    end = 0
+    for part in sorted(parts, key=lambda part: part.start):
+        if part.start < end or part.start + part.length > sectors:
+            raise UnsupportedImage("Overlapping or truncated partitions")
+        end = part.start + part.length
+
+
+def _with_unallocated(rows, sectors):
+    # mmls fills the gaps between non-meta entries with Unallocated rows and
+    # keeps entries that share a start sector in the order they were added
+    gaps = []
+    end = 0
+    for row in sorted((row for row in rows if row.slot != 'Meta'), key=lambda row: row.start):
+        if row.start > end:
+            gaps.append(Partition(end, row.start - end, '-------', 'Unallocated'))
+        end = row.start + row.length
+    if end < sectors:
+        gaps.append(Partition(end, sectors - end, '-------', 'Unallocated'))
+    return sorted(rows + gaps, key=lambda row: row.start)
+
+
+def list_ntfs_files(image, start_sector):
+    """Recursive file listing of the NTFS volume at ``start_sector``.
+
+    Output matches ``fls -r -o <start_sector>``, including the unnamed
+    OrphanFile-<inum> records fls lists under $OrphanFiles. Raises
+    UnsupportedImage when the volume has anything fls reports that is not
+    reproduced here: deleted or orphaned names, orphaned directories,
+    names left in index slack, attribute lists, sparse metadata or
+    directory indexes deeper than one node.
+    """
+    try:
+        return NtfsVolume(image, start_sector * SECTOR_SIZE).listing()
+    except _MALFORMED as e:
+        raise UnsupportedImage(f"Malformed NTFS metadata: {e}") from e
+
+
+class NtfsVolume(object):
+    """Read-only view of the NTFS metadata needed for an fls listing.
+
+    The whole $MFT is read once and every in-use record is parsed up front,
+    so the checks for deleted and orphaned files see the full table.
+    """
+
+    def __init__(self, image, offset):
+        self.image = image
+        self.offset = offset
+        boot = bytes(image[offset:offset + SECTOR_SIZE])
+        if len(boot) < SECTOR_SIZE or boot[3:11] != b'NTFS    ' or boot[510:512] != b'\x55\xaa':
+            raise UnsupportedImage("No NTFS boot sector")
+
+        sector_size, sectors_per_cluster = struct.unpack_from('<HB', boot, 11)
+        if sectors_per_cluster > 0x80:
+            sectors_per_cluster = 1 << (256 - sectors_per_cluster)
+        if sector_size not in (512, 1024, 2048, 4096) or not sectors_per_cluster:
+            raise UnsupportedImage("Unsupported NTFS geometry")
+        self.cluster_size = sector_size * sectors_per_cluster
+        mft_lcn, = struct.unpack_from('<Q', boot, 0x30)
+        record_clusters, = struct.unpack_from('<b', boot, 0x40)
+        self.record_size = 1 << -record_clusters if record_clusters < 0 else record_clusters * self.cluster_size
+        if self.record_size < FIXUP_STRIDE or self.record_size % FIXUP_STRIDE:
+            raise UnsupportedImage("Unsupported MFT record size")
+
+        first = self._image_bytes(mft_lcn * self.cluster_size, self.record_size)
+        mft = self._parse_record(first)
+        if mft is None or not mft.flags & RECORD_IN_USE:
+            raise UnsupportedImage("Unreadable $MFT record")
+        data = self._attribute(mft, ATTR_DATA, '')
+        if data is None or data.runs is None:
+            raise UnsupportedImage("No non-resident $MFT data")
+        table = self._read_stream(data)
+        self.count = data.size // self.record_size
+
+        self.records = {}
+        self.unnamed = {}
+        for inum in range(self.count):
+            raw = table[inum * self.record_size:(inum + 1) * self.record_size]
+            if raw[:4] != b'FILE':
+                continue
+            record = self._parse_record(raw)
+            if record is None:
+                raise UnsupportedImage(f"MFT record {inum} failed its fixup check")
+            extension = struct.unpack_from('<Q', raw, 0x20)[0]
+            if not record.flags & RECORD_IN_USE:
+                if record.names:
+                    raise UnsupportedImage(f"Deleted file in MFT record {inum}")
+                # fls lists used but unallocated base records as OrphanFile-<inum>
+                if not extension and record.attributes:
+                    if record.flags & RECORD_IS_DIR:
+                        raise UnsupportedImage(f"Orphaned directory in MFT record {inum}")
+                    self.unnamed[inum] = record
+                continue
+            if extension:
+                raise UnsupportedImage(f"MFT extension record {inum}")
+            self.records[inum] = record
+
+    def listing(self):
+        lines = []
+        seen = set()
+        if 5 not in self.records:
+            raise UnsupportedImage("No root directory")
+        self._walk(5, 0, (5,), lines, seen)
+        lines.append(f"V/V {self.count}:\t$OrphanFiles")
+        for inum, record in self.unnamed.items():
+            self._entry_lines("+ ", "-", f"* {inum}", f"OrphanFile-{inum}", record, lines)
+
+        # fls lists anything unreachable from the root under $OrphanFiles
+        for inum, record in self.records.items():
+            for name in record.names:
+                if name.namespace != NAMESPACE_DOS and name.name != '.' and (name.parent, name.name) not in seen:
+                    raise UnsupportedImage(f"Orphaned MFT record {inum}")
+        return "".join(line + "\n" for line in lines)
+
+    def _walk(self, dir_inum, depth, stack, lines, seen):
+        prefix = '+' * depth + ' ' if depth else ''
+        for entry in self._dir_entries(dir_inum):
+            if entry.namespace == NAMESPACE_DOS or entry.name in ('.', '..'):
+                continue
+            record = self.records.get(entry.inum)
+            if record is None or record.seq != entry.seq:
+                raise UnsupportedImage(f"Index entry {entry.name!r} points to a reused record")
+            seen.add((dir_inum, entry.name))
+
+            name_type = 'd' if entry.is_dir else 'r'
+            self._entry_lines(prefix, name_type, entry.inum, entry.name, record, lines)
+
+            if record.flags & RECORD_IS_DIR and entry.inum not in stack:
+                self._walk(entry.inum, depth + 1, stack + (entry.inum,), lines, seen)
+
+    def _entry_lines(self, prefix, name_type, inum, name, record, lines):
+        """Appends fls lines for one name: one per $DATA or index root stream."""
+        name = _sanitize(name)
+        is_dir = record.flags & RECORD_IS_DIR
+        printed = False
+        for attr in record.attributes:
+            if attr.type not in (ATTR_DATA, ATTR_INDEX_ROOT):
+                continue
+            printed = True
+            # A $DATA stream on a directory is printed as a regular file
+            meta_type = 'd' if is_dir and attr.type != ATTR_DATA else 'r'
+            stream = ''
+            if attr.name and not (attr.type == ATTR_INDEX_ROOT and attr.name == '$I30'):
+                stream = ':' + _sanitize(attr.name)
+            lines.append(f"{prefix}{name_type}/{meta_type} {inum}-{attr.type}-{attr.id}:\t{name}{stream}")
+        if not printed:
+            lines.append(f"{prefix}{name_type}/{'d' if is_dir else 'r'} {inum}:\t{name}")
+
+    def _dir_entries(self, inum):
+        record = self.records[inum]
+        root = self._attribute(record, ATTR_INDEX_ROOT, '$I30')
+        if root is None or root.value is None:
+            raise UnsupportedImage(f"Directory {inum} has no $I30 index root")
+        value = root.value
+        block_size, = struct.unpack_from('<I', value, 8)
+        entries, has_child = self._node_entries(value, 16, inum)
+
+        allocation = self._attribute(record, ATTR_INDEX_ALLOCATION, '$I30')
+        if allocation is None:
+            if has_child:
+                raise UnsupportedImage(f"Directory {inum} index has no allocation")
+            return entries
+        # A single leaf under an empty root lists in name order, like fls;
+        # deeper trees are left to fls
+        if entries or not has_child or not block_size:
+            raise UnsupportedImage(f"Directory {inum} index is more than one node deep")
+        data = self._read_stream(allocation)
+        bitmap = self._attribute(record, ATTR_BITMAP, '$I30')
+        bits = (bitmap.value if bitmap.runs is None else self._read_stream(bitmap)) if bitmap else b''
+        blocks = [n for n in range(len(data) // block_size) if n // 8 < len(bits) and bits[n // 8] >> (n % 8) & 1]
+        for n in range(len(data) // block_size):
+            if n not in blocks and data[n * block_size:n * block_size + 4] == b'INDX':
+                raise UnsupportedImage(f"Directory {inum} has a freed index block")
+        if len(blocks) != 1:
+            raise UnsupportedImage(f"Directory {inum} index is more than one node deep")
+
+        block = self._fixup(data[blocks[0] * block_size:(blocks[0] + 1) * block_size], b'INDX')
+        if block is None:
+            raise UnsupportedImage(f"Directory {inum} index block failed its fixup check")
+        entries, has_child = self._node_entries(block, 0x18, inum)
+        if has_child:
+            raise UnsupportedImage(f"Directory {inum} index is more than one node deep")
+        return entries
+
+    def _node_entries(self, buf, node, dir_inum):
+        first, used, allocated = struct.unpack_from('<III', buf, node)
+        pos, end = node + first, node + used
+        if end > len(buf) or node + allocated > len(buf):
+            raise UnsupportedImage(f"Directory {dir_inum} index node is truncated")
+        entries = []
+        has_child = False
+        while True:
+            if pos + 16 > end:
+                raise UnsupportedImage(f"Directory {dir_inum} index node is corrupt")
+            ref, length, stream_len, flags = struct.unpack_from('<QHHB', buf, pos)
+            if length < 16 or length % 8 or pos + length > end:
+                raise UnsupportedImage(f"Directory {dir_inum} index node is corrupt")
+            has_child = has_child or bool(flags & ENTRY_HAS_CHILD)
+            if flags & ENTRY_LAST:
+                break
+            if stream_len < 66 or 16 + stream_len > length:
+                raise UnsupportedImage(f"Directory {dir_inum} index node is corrupt")
+            entries.append(self._index_entry(ref, buf[pos + 16:pos + 16 + stream_len]))
+            pos += length
+
+        # fls digs deleted names out of the unused part of a node
+        slack_start = pos + length
+        for off in range(slack_start, node + allocated - 82 + 1, 8):
+            parent = int.from_bytes(buf[off + 16:off + 22], 'little')
+            if parent == dir_inum and buf[off + 80]:
+                raise UnsupportedImage(f"Directory {dir_inum} has names in index slack")
+        return entries, has_child
+
+    def _index_entry(self, ref, stream):
+        parent = int.from_bytes(stream[0:6], 'little')
+        flags, = struct.unpack_from('<I', stream, 56)
+        name_len, namespace = stream[64], stream[65]
+        if 66 + 2 * name_len > len(stream):
+            raise UnsupportedImage("Index entry name is truncated")
+        return IndexEntry(
+            ref & 0xffffffffffff, ref >> 48, _utf16(stream[66:66 + 2 * name_len]),
+            parent, bool(flags & NAME_IS_DIR), namespace,
+        )
+
+    def _parse_record(self, raw):
+        record = self._fixup(raw, b'FILE')
+        if record is None:
+            return None
+        seq, _, first, flags = struct.unpack_from('<HHHH', record, 0x10)
+        attributes = []
+        names = []
+        pos = first
+        while pos + 4 <= len(record):
+            attr_type, = struct.unpack_from('<I', record, pos)
+            if attr_type == ATTR_END:
+                break
+            if pos + _ATTR_HEADER.size > len(record):
+                raise UnsupportedImage("Attribute header is truncated")
+            _, length, nonresident, name_len, name_off, _, attr_id = _ATTR_HEADER.unpack_from(record, pos)
+            if length < _ATTR_HEADER.size or pos + length > len(record):
+                raise UnsupportedImage("Attribute is truncated")
+            if attr_type == ATTR_ATTRIBUTE_LIST:
+                raise UnsupportedImage("Attribute lists are not supported")
+            attr = record[pos:pos + length]
+            name = _utf16(attr[name_off:name_off + 2 * name_len])
+            if nonresident:
+                start_vcn, _, runs_off, _, size, _ = _NONRESIDENT.unpack_from(attr, 16)
+                if start_vcn:
+                    raise UnsupportedImage("Attribute split across records")
+                attributes.append(Attribute(attr_type, name, attr_id, None, _decode_runs(attr[runs_off:]), size))
+            else:
+                value_len, value_off = struct.unpack_from('<IH', attr, 16)
+                value = attr[value_off:value_off + value_len]
+                attributes.append(Attribute(attr_type, name, attr_id, value, None, value_len))
+                if attr_type == ATTR_FILE_NAME and len(value) >= 66:
+                    names.append(self._index_entry(0, value))
+            pos += length
+        return MftRecord(flags, seq, attributes, names)
+
+    def _fixup(self, raw, signature):
+        if raw[:4] != signature:
+            return None
+        buf = bytearray(raw)
+        usa_off, usa_count = struct.unpack_from('<HH', buf, 4)
+        if usa_count - 1 != len(buf) // FIXUP_STRIDE or usa_off + 2 * usa_count > len(buf):
+            return None
+        check = buf[usa_off:usa_off + 2]
+        for i in range(1, usa_count):
+            tail = i * FIXUP_STRIDE - 2
+            if buf[tail:tail + 2] != check:
+                return None
+            buf[tail:tail + 2] = buf[usa_off + 2 * i:usa_off + 2 * i + 2]
+        return bytes(buf)
+
+    def _attribute(self, record, attr_type, name):
+        for attr in record.attributes:
+            if attr.type == attr_type and attr.name == name:
+                return attr
+        return None
+
+    def _read_stream(self, attr):
+        parts = []
+        for lcn, clusters in attr.runs:
+            if lcn is None or lcn < 0:
+                raise UnsupportedImage("Sparse metadata stream")
+            parts.append(self._image_bytes(lcn * self.cluster_size, clusters * self.cluster_size))
+        data = b''.join(parts)
+        if len(data) < attr.size:
+            raise UnsupportedImage("Metadata stream is truncated")
+        return data[:attr.size]
+
+    def _image_bytes(self, offset, length):
+        start = self.offset + offset
+        if start + length > len(self.image):
+            raise UnsupportedImage("Metadata runs past the end of the image")
+        return bytes(self.image[start:start + length])
+
+
+def _decode_runs(data):
+    runs = []
+    lcn = 0
+    pos = 0
+    while pos < len(data) and data[pos]:
+        length_size, offset_size = data[pos] & 0x0f, data[pos] >> 4
+        pos += 1
+        if not length_size or pos + length_size + offset_size > len(data):
+            raise UnsupportedImage("Corrupt run list")
+        clusters = int.from_bytes(data[pos:pos + length_size], 'little')
+        pos += length_size
+        if offset_size:
+            lcn += int.from_bytes(data[pos:pos + offset_size], 'little', signed=True)
+            runs.append((lcn, clusters))
+        else:
+            runs.append((None, clusters))
+        pos += offset_size
+    return runs
+
+
+def _utf16(raw):
+    try:
+        return bytes(raw).decode('utf-16-le')
+    except UnicodeDecodeError:
+        raise UnsupportedImage("Name is not valid UTF-16")
+
+
+def _sanitize(name):
+    # fls prints control characters as '^'
+    return ''.join('^' if ord(char) < 0x20 else char for char in name)
@@ -0,0 +1,21 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=32)
+def _keywords(words):
+    # Drop empty lines and repeats, keeping the first occurrence's position
+    return tuple(word for word in dict.fromkeys(words) if word)
+
+
+def find_keyword(words, text):
+    """Return the first of ``words`` (in list order) that occurs in ``text``.
+
+    Returns None when nothing matches. Each keyword is one substring search
+    in C, which beats a combined ``re`` alternation by a wide margin on
+    large inputs since ``re`` backtracks through every alternative at every
+    position.
+    """
+    for word in _keywords(tuple(words)):
+        if word in text:
+            return word
+    return None
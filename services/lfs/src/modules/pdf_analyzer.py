@@ -1,78 +1,72 @@
 import os
-import subprocess
-import uuid
 import shutil
-from PyPDF2 import PdfReader
-from PyPDF2.generic import DictionaryObject, IndirectObject
 import pikepdf
 from io import BytesIO, StringIO
 import sys
 from markupsafe import escape
+from modules.tool_runner import start_tool, wait_tools
+from modules.config_cache import BlacklistSnapshot, load_cached, read_flag
+from modules.keyword_match import find_keyword
+from modules.upload_stage import read_upload, stage_upload, discard_stage
 
 BLACKLIST_FILE = '/app/blacklists/exec_blacklist.txt'
-UPLOAD_FOLDER = '/app/uploads'
 DOWNLOAD_FOLDER = '/app/static/downloads'  
 MAX_FILE_SIZE = 150 * 1024
 PDF_SIGNATURE = b'%PDF-'
-FLAG = open('/flag.txt', 'r').read().strip()
+FLAG = read_flag()
 
 def onlyonelenchars(s):
     return len(s) <= 1
 
+def parse_blacklist(text):
+    lines = text.splitlines()
+    valid_lines = lines[:4]
+    processed_lines = []
+    quota = 0
+    for line in valid_lines:
+        clean_line = line.strip()[:10]
+        if onlyonelenchars(clean_line):
+            continue
+        processed_lines.append(clean_line)
+        lng = len(clean_line)
+        quota += (lng * 3) + ((10 - lng) * 15)
+    if quota == 0:
+        quota = 150
+    return BlacklistSnapshot(tuple(processed_lines), quota)
+
 def get_blacklist():
-    try:
-        with open(BLACKLIST_FILE, 'r') as f:
-            lines = f.read().splitlines()
-            valid_lines = lines[:4]
-            processed_lines = []
-            for line in valid_lines:
-                clean_line = line.strip()[:10]
-                if onlyonelenchars(clean_line):
-                    continue
-                processed_lines.append(clean_line)
-            return processed_lines
-    except FileNotFoundError:
-        return
+    snapshot = load_cached(BLACKLIST_FILE, parse_blacklist)
+    return list(snapshot.words) if snapshot else None
 
 def get_string_quota():
-    try:
-        quota = 0
-        with open(BLACKLIST_FILE, 'r') as f:
-            lines = f.read().splitlines()
-            valid_lines = lines[:4] 
-            for line in valid_lines:
-                lng = len(line.strip()[:10])
-                clean_line = line.strip()[:10]
-                if onlyonelenchars(clean_line):
-                    continue
-                line_quota = (lng * 3) + ((10 - lng) * 15)
-                quota += line_quota
-            if quota == 0:
-                quota = 150
-            return quota
-    except FileNotFoundError:
-        return
-
-def dump_pdf_objects(reader: PdfReader):
+    snapshot = load_cached(BLACKLIST_FILE, parse_blacklist)
+    return snapshot.quota if snapshot else None
+
+def pdf_version(content: bytes):
+    # The first 8 bytes of the header, e.g. "%PDF-1.7"
+    return content[:8].decode("utf-8")
+
+def count_page_images(page: pikepdf.Page):
+    # page.resources follows /Resources inherited from the page tree
+    xobjects = page.resources.get("/XObject", {})
+    return sum(1 for name in xobjects.keys() if xobjects[name].get("/Subtype") == "/Image")
+
+def dump_pdf_objects(pdf: pikepdf.Pdf):
     output_lines = []
     try:
-        output_lines.append(f"Analyzing {len(reader.pages)} page(s) for actionable objects...")
+        output_lines.append(f"Analyzing {len(pdf.pages)} page(s) for actionable objects...")
     except Exception:
         output_lines.append("Analyzing <unknown number of pages> for actionable objects...")
 
     interesting_objects = []
 
-    for page_num, page in enumerate(getattr(reader, "pages", [])):
+    for page_num, page in enumerate(pdf.pages):
         try:
-            annots = page.get("/Annots", None)
+            annots = page.obj.get("/Annots", None)
             if not annots:
                 continue
 
-            for annot_ref in annots:
-                try:
-                    obj = annot_ref.get_object()
-                except Exception:
-                    continue
+            for obj in annots:
 
                 subtype = obj.get("/Subtype")
                 action = obj.get("/A")
@@ -81,7 +75,7 @@ def dump_pdf_objects(reader: PdfReader):
 
                 if subtype == "/Link" and action:
                     try:
-                        action_obj = action.get_object()
+                        action_obj = action
                         if action_obj.get("/S") == "/URI":
                             uri = action_obj.get("/URI")
                             interesting_objects.append(f"  - Page {page_num + 1}: Found URI Link pointing to: {uri}")
@@ -90,11 +84,15 @@ def dump_pdf_objects(reader: PdfReader):
 
                 elif subtype == "/Widget" and action:
                     try:
-                        action_obj = action.get_object()
+                        action_obj = action
                         print(action_obj, flush=True)
                         if action_obj.get("/S") == "/JavaScript":
                             print("Got JS object", flush=True)
                             js_code = action_obj.get("/JS")
+                            if isinstance(js_code, pikepdf.Stream):
+                                js_code = js_code.read_bytes()
+                            elif js_code is not None:
+                                js_code = str(js_code)
                             length = len(js_code) if js_code else 0
                             interesting_objects.append(f"  - Page {page_num + 1}: Found Form Widget with JavaScript (Code length: {length} bytes)")
                     except Exception:
@@ -114,8 +112,24 @@ def dump_pdf_objects(reader: PdfReader):
     return "\n".join(output_lines)
 
 
+def read_pyscript(value):
+    raw = value.read_bytes() if isinstance(value, pikepdf.Stream) else bytes(value)
+    return raw.decode("utf-8", "ignore").strip() if raw else None
+
+def find_pyscript(pdf: pikepdf.Pdf):
+    """Returns the /PyScript source from /Root, or None."""
+    try:
+        if "/PyScript" in pdf.Root:
+            pyscript_code = read_pyscript(pdf.Root["/PyScript"])
+            if pyscript_code:
+                return pyscript_code
+    except Exception:
+        pass
+    return None
+
+
 def handle_pdf_analysis(request):
-    FLAG = open('/flag.txt', 'r').read().strip()
+    FLAG = read_flag()
     file = request.files.get('pdf_file')
 
     if not file or not file.filename:
@@ -123,67 +137,76 @@ def handle_pdf_analysis(request):
     if not file.filename.lower().endswith('.pdf'):
         return {'error': "Invalid file type. Only .pdf files are accepted."}
 
-    file.seek(0, os.SEEK_END)
-    if file.tell() > MAX_FILE_SIZE:
+    content = read_upload(file, MAX_FILE_SIZE)
+    if content is None:
         return {'error': "File size exceeds the 150KB limit."}
-    file.seek(0)
 
-    first_bytes = file.read(5)
-    if first_bytes != PDF_SIGNATURE:
+    if content[:5] != PDF_SIGNATURE:
         return {'error': "Invalid file signature. Not a valid PDF."}
-    file.seek(0)
 
-    session_id = str(uuid.uuid4())
-    temp_dir = os.path.join(UPLOAD_FOLDER, session_id)
-    os.makedirs(temp_dir, exist_ok=True)
-    filepath = os.path.join(temp_dir, file.filename)
-    file.save(filepath)
+    temp_dir, filepath = stage_upload(content, file.filename)
+    session_id = os.path.basename(temp_dir)
+
+    html_output_dir = os.path.join(temp_dir, "html_export")
+    os.makedirs(html_output_dir, exist_ok=True)
+
+    output_prefix = "export"
+
+    # exiftool and pdftohtml run while the PDF is parsed below
+    exif_future = start_tool(['exiftool', filepath], capture_output=True, text=True, timeout=10)
+    pdftohtml_future = start_tool(
+        ['pdftohtml', filepath, os.path.join(temp_dir, output_prefix)],
+        timeout=15,
+        check=True
+    )
 
     results = {}
+    pdf = None
     try:
+        # Parse while exiftool and pdftohtml run; a parse error is reported
+        # after the exiftool output, as before
+        parse_error = None
         try:
-            exif_process = subprocess.run(['exiftool', filepath], capture_output=True, text=True, timeout=10)
-            exif_data = exif_process.stdout if exif_process.returncode == 0 else exif_process.stderr
-            results['exif_data'] = escape(exif_data)
-        except Exception as e:
-            results['exif_data'] = f"exiftool error: {escape(repr(e))}"
+            # One parse feeds the stats, the annotation dump and the PyScript lookup
+            pdf = pikepdf.open(BytesIO(content))
 
-        stream_scan_output = []
-        with open(filepath, 'rb') as f:
-            reader = PdfReader(f)
+            stream_scan_output = []
             try:
-                stream_scan_output.append(f"PDF Version: {reader.pdf_header}")
+                stream_scan_output.append(f"PDF Version: {pdf_version(content)}")
             except Exception:
                 stream_scan_output.append("PDF Version: <unavailable>")
 
             try:
-                stream_scan_output.append(f"Number of pages: {len(reader.pages)}")
+                stream_scan_output.append(f"Number of pages: {len(pdf.pages)}")
             except Exception:
                 stream_scan_output.append("Number of pages: <unavailable>")
 
-            for i, page in enumerate(reader.pages):
+            for i, page in enumerate(pdf.pages):
                 try:
-                    images = getattr(page, 'images', None)
-                    images_count = len(images) if images else 0
+                    images_count = count_page_images(page)
                 except Exception:
                     images_count = 0
                 stream_scan_output.append(f"  - Page {i+1} contains {images_count} image(s).")
 
-            results['object_dump_data'] = escape(dump_pdf_objects(reader))
+            object_dump = dump_pdf_objects(pdf)
+        except Exception as e:
+            parse_error = e
 
-        results['stream_scan_data'] = escape("\n".join(stream_scan_output))
+        try:
+            exif_process = exif_future.result()
+            exif_data = exif_process.stdout if exif_process.returncode == 0 else exif_process.stderr
+            results['exif_data'] = escape(exif_data)
+        except Exception as e:
+            results['exif_data'] = f"exiftool error: {escape(repr(e))}"
 
-        html_output_dir = os.path.join(temp_dir, "html_export")
-        os.makedirs(html_output_dir, exist_ok=True)
+        if parse_error is not None:
+            raise parse_error
+        results['object_dump_data'] = escape(object_dump)
 
-        output_prefix = "export"
+        results['stream_scan_data'] = escape("\n".join(stream_scan_output))
 
         try:
-            subprocess.run(
-                ['pdftohtml', filepath, os.path.join(temp_dir, output_prefix)],
-                timeout=15,
-                check=True
-            )
+            pdftohtml_future.result()
 
             for item in os.listdir(temp_dir):
                 if item.startswith(output_prefix):
@@ -198,65 +221,8 @@ def handle_pdf_analysis(request):
         except Exception as e:
             results['html_export_error'] = f"pdftohtml failed or not installed: {escape(repr(e))}"
 
-        pyscript_code = None
         try:
-            with pikepdf.open(filepath) as pdf:
-
-                try:
-                    if "/PyScript" in pdf.Root:
-                        stream_obj = pdf.Root["/PyScript"]
-                        try:
-                            raw = stream_obj.read_bytes() if hasattr(stream_obj, "read_bytes") else bytes(stream_obj)
-                        except Exception:
-                            try:
-                                raw = bytes(stream_obj)
-                            except Exception:
-                                raw = None
-                        if raw:
-                            pyscript_code = raw.decode("utf-8", "ignore").strip()
-                except Exception as e:
-                    pass
-                if not pyscript_code:
-                    for obj in pdf.objects.values():
-                        try:
-                            if hasattr(obj, "keys"):
-                                keys = obj.keys()
-                                if "/PyScript" in keys or b"/PyScript" in keys:
-                                    try:
-                                        val = obj.get("/PyScript") or obj.get(b"/PyScript")
-                                        raw = val.read_bytes() if hasattr(val, "read_bytes") else (bytes(val) if val is not None else None)
-                                        if raw:
-                                            pyscript_code = raw.decode("utf-8", "ignore").strip()
-                                            break
-                                    except Exception as e:
-                                        continue
-                            raw_stream = None
-                            if hasattr(obj, "read_bytes") and callable(obj.read_bytes):
-                                try:
-                                    raw_stream = obj.read_bytes()
-                                except Exception:
-                                    raw_stream = None
-                            else:
-                                try:
-                                    raw_stream = bytes(obj)
-                                except Exception:
-                                    raw_stream = None
-
-                            if raw_stream:
-                                if b"PyScript" in raw_stream or b"/PyScript" in raw_stream:
-                                    try:
-                                        pyscript_code = raw_stream.decode("utf-8", "ignore").strip()
-                                        break
-                                    except Exception:
-                                        try:
-                                            pyscript_code = raw_stream.decode("latin-1", "ignore").strip()
-                                            break
-                                        except Exception:
-                                            pass
-
-                        except Exception as e:
-                            continue
-
+            pyscript_code = find_pyscript(pdf)
         except Exception as e:
             pyscript_code = None
 
@@ -264,10 +230,10 @@ def handle_pdf_analysis(request):
             results['pyscript_found'] = True
             results['pyscript_length'] = len(pyscript_code)
             blacklist = get_blacklist()
-            for word in blacklist:
-                if word and word in pyscript_code:
-                    print("Blacklisted!", flush=True)
-                    raise ValueError(f"Execution blocked: Malicious keyword '{word}' found.")
+            word = find_keyword(blacklist, pyscript_code)
+            if word:
+                print("Blacklisted!", flush=True)
+                raise ValueError(f"Execution blocked: Malicious keyword '{word}' found.")
             string_quota = get_string_quota()
             if len(pyscript_code) > string_quota:
                 raise ValueError("Execution blocked: PyScript code exceeds allowed length based on blacklist.")
@@ -291,10 +257,9 @@ def handle_pdf_analysis(request):
     except Exception as e:
         results['error'] = escape(str(e))
     finally:
-        if os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir)
-            except Exception:
-                pass
+        wait_tools(exif_future, pdftohtml_future)
+        if pdf is not None:
+            pdf.close()
+        discard_stage(temp_dir, filepath)
 
     return results
@@ -1,52 +1,44 @@
-import os
-import subprocess
 from flask import render_template_string
+from modules.tool_runner import start_tool, wait_tools
+from modules.config_cache import BlacklistSnapshot, load_cached, read_flag
+from modules.keyword_match import find_keyword
+from modules.upload_stage import read_upload, stage_upload, discard_stage
+from modules.png_chunks import PngChunks
 
 BLACKLIST_FILE = '/app/blacklists/eval_blacklist.txt'
-UPLOAD_FOLDER = '/app/uploads'
 MAX_FILE_SIZE = 80 * 1024
 PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n' 
-FLAG = open('/flag.txt', 'r').read().strip()
+FLAG = read_flag()
 
 def onlyonelenchars(s):
     return len(s) <= 1
 
+def parse_blacklist(text):
+    lines = text.splitlines()
+    valid_lines = lines[:3]
+    processed_lines = []
+    quota = 0
+    for line in valid_lines:
+        clean_line = line.strip()[:10]
+        if onlyonelenchars(clean_line):
+            continue
+        processed_lines.append(clean_line)
+        lng = len(clean_line)
+        quota += (lng * 3) + ((10 - lng) * 15)
+    if quota == 0:
+        quota = 140
+    return BlacklistSnapshot(tuple(processed_lines), quota)
+
 def get_blacklist():
-    try:
-        with open(BLACKLIST_FILE, 'r') as f:
-            lines = f.read().splitlines()
-            valid_lines = lines[:3] 
-            processed_lines = []
-            for line in valid_lines:
-                clean_line = line.strip()[:10]
-                if onlyonelenchars(clean_line):
-                    continue
-                processed_lines.append(clean_line)
-            return processed_lines
-    except FileNotFoundError:
-        return
+    snapshot = load_cached(BLACKLIST_FILE, parse_blacklist)
+    return list(snapshot.words) if snapshot else None
     
 def get_string_quota():
-    try:
-        quota = 0
-        with open(BLACKLIST_FILE, 'r') as f:
-            lines = f.read().splitlines()
-            valid_lines = lines[:3] 
-            for line in valid_lines:
-                lng = len(line.strip()[:10])
-                clean_line = line.strip()[:10]
-                if onlyonelenchars(clean_line):
-                    continue
-                line_quota = (lng * 3) + ((10 - lng) * 15)
-                quota += line_quota
-            if quota == 0:
-                quota = 140
-            return quota
-    except FileNotFoundError:
-        return
+    snapshot = load_cached(BLACKLIST_FILE, parse_blacklist)
+    return snapshot.quota if snapshot else None
 
 def handle_png_analysis(request):
-    FLAG = open('/flag.txt', 'r').read().strip()
+    FLAG = read_flag()
     file = request.files.get('png_file')
     
     if not file or not file.filename:
@@ -55,47 +47,44 @@ def handle_png_analysis(request):
     if not file.filename.lower().endswith('.png'):
         return {'error': "Invalid file type. Only.png files are accepted."}
 
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    if file_size > MAX_FILE_SIZE:
+    content = read_upload(file, MAX_FILE_SIZE)
+    if content is None:
         return {'error': f"File size exceeds the maximum limit of {MAX_FILE_SIZE/ 1024}KB."}
-    file.seek(0) 
 
-    header = file.read(8)
-    if header!= PNG_SIGNATURE:
+    if content[:8] != PNG_SIGNATURE:
         return {'error': "Invalid file signature. The uploaded file is not a valid PNG."}
-    file.seek(0) 
-
 
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    filepath = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(filepath)
+    temp_dir, filepath = stage_upload(content, file.filename)
 
     results = {}
+    exif_future = start_tool(['exiftool', filepath], capture_output=True, text=True, timeout=10)
     try:
-        exif_process = subprocess.run(['exiftool', filepath], capture_output=True, text=True, timeout=10)
-        results['exif_data'] = exif_process.stdout if exif_process.returncode == 0 else exif_process.stderr
+        # Walk the chunks while exiftool runs; a parse error is reported
+        # after the exiftool output, as before
+        parse_error = None
+        try:
+            chunks = PngChunks(content)
+            lftd_chunk = chunks.find('LFTD')
+            chunk_stats = chunks.stats()
+        except Exception as e:
+            parse_error = e
 
-        pngcheck_process = subprocess.run(['pngcheck', '-v', filepath], capture_output=True, text=True, timeout=10)
-        results['pngcheck_data'] = pngcheck_process.stdout if pngcheck_process.returncode == 0 else pngcheck_process.stderr
+        exif_process = exif_future.result()
+        results['exif_data'] = exif_process.stdout if exif_process.returncode == 0 else exif_process.stderr
 
-        content = open(filepath, 'rb').read()
-        chunk_type = b'LFTD' 
-        chunk_start = content.find(chunk_type)
+        if parse_error is not None:
+            raise parse_error
+        results['chunk_stats'] = chunk_stats
 
-        if chunk_start > 0:
-            data_len_bytes = content[chunk_start - 4 : chunk_start]
-            data_len = int.from_bytes(data_len_bytes, 'big')
-            
-            data_start = chunk_start + 4
-            chunk_data = content[data_start : data_start + data_len].decode('utf-8', 'ignore')
+        if lftd_chunk is not None:
+            chunk_data = chunks.data(lftd_chunk).decode('utf-8', 'ignore')
             
             results['lftd_header_found'] = True
             
             blacklist = get_blacklist()
-            for word in blacklist:
-                if word and word in chunk_data:
-                    raise ValueError(f"Execution blocked: Malicious keyword '{word}' found in LFTD chunk.")
+            word = find_keyword(blacklist, chunk_data)
+            if word:
+                raise ValueError(f"Execution blocked: Malicious keyword '{word}' found in LFTD chunk.")
             
             string_quota = get_string_quota()
             if len(chunk_data) > string_quota:
@@ -107,7 +96,7 @@ def handle_png_analysis(request):
     except Exception as e:
         results['processing_error'] = str(e)
     finally:
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        wait_tools(exif_future)
+        discard_stage(temp_dir, filepath)
             
     return results
\ No newline at end of file
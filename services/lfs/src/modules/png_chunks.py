@@ -0,0 +1,133 @@
+import struct
+import zlib
+from collections import namedtuple
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+COLOR_TYPES = {0: 'grayscale', 2: 'RGB', 3: 'palette', 4: 'grayscale+alpha', 6: 'RGBA'}
+
+_HEADER = struct.Struct('>I4s')
+_IHDR = struct.Struct('>IIBBBBB')
+
+# offset is where the chunk's length field starts
+Chunk = namedtuple('Chunk', ['type', 'offset', 'length', 'data_start'])
+
+
+def _valid_type(ctype):
+    return all(65 <= c <= 90 or 97 <= c <= 122 for c in ctype)
+
+
+class PngChunks(object):
+    """Chunk walker over a PNG held in memory.
+
+    Headers are read one chunk at a time and only as far as a caller needs,
+    so ``find()`` stops at the first chunk of the requested type. Every chunk
+    walked so far is kept in ``chunks`` and in ``index`` (type -> chunks).
+    CRCs are only computed when ``crc_ok()`` or ``stats()`` asks for them.
+
+    The walk ends at the end of the data, at a chunk type that is not four
+    ASCII letters, or at a chunk whose data runs past the end of the file.
+    That last chunk is still recorded, with its data cut short. Chunks after
+    IEND are walked like any other, so data appended to an image is still
+    seen.
+    """
+
+    def __init__(self, content):
+        self.content = content
+        self.chunks = []
+        self.index = {}
+        self.error = None
+        self._pos = len(PNG_SIGNATURE)
+        self._done = content[:len(PNG_SIGNATURE)] != PNG_SIGNATURE
+        if self._done:
+            self.error = "Missing PNG signature"
+
+    def __iter__(self):
+        i = 0
+        while i < len(self.chunks) or self._advance():
+            yield self.chunks[i]
+            i += 1
+
+    def find(self, ctype):
+        """First chunk of type ``ctype`` (e.g. ``'LFTD'``), or None."""
+        found = self.index.get(ctype)
+        if found:
+            return found[0]
+        while self._advance():
+            if self.chunks[-1].type == ctype:
+                return self.chunks[-1]
+        return None
+
+    def data(self, chunk):
+        return self.content[chunk.data_start:chunk.data_start + chunk.length]
+
+    def crc_ok(self, chunk):
+        """True or False, or None when the file ends before the CRC."""
+        end = chunk.data_start + chunk.length
+        stored = self.content[end:end + 4]
+        if len(stored) < 4:
+            return None
+        view = memoryview(self.content)[chunk.offset + 4:end]
+        return zlib.crc32(view) == int.from_bytes(stored, 'big')
+
+    def stats(self):
+        """Summary of the whole file for the analyzer page."""
+        chunks = []
+        crc_errors = 0
+        for chunk in self:
+            crc = self.crc_ok(chunk)
+            if crc is False:
+                crc_errors += 1
+            chunks.append({
+                'type': chunk.type,
+                'offset': chunk.offset,
+                'length': chunk.length,
+                'crc': 'missing' if crc is None else ('OK' if crc else 'BAD'),
+            })
+
+        ihdr = None
+        first = self.chunks[0] if self.chunks else None
+        if first is not None and first.type == 'IHDR' and first.length == _IHDR.size:
+            width, height, bit_depth, color_type, _, _, interlace = _IHDR.unpack(self.data(first))
+            ihdr = {
+                'width': width,
+                'height': height,
+                'bit_depth': bit_depth,
+                'color_type': COLOR_TYPES.get(color_type, f'unknown ({color_type})'),
+                'interlaced': bool(interlace),
+            }
+
+        iend = self.index.get('IEND')
+        end = iend[0].data_start + 4 if iend else None
+        return {
+            'chunks': chunks,
+            'ihdr': ihdr,
+            'iend_found': iend is not None,
+            'trailing_bytes': max(0, len(self.content) - end) if end is not None else 0,
+            'crc_errors': crc_errors,
+            'error': self.error,
+        }
+
+    def _advance(self):
+        if self._done:
+            return False
+        content, pos = self.content, self._pos
+        if pos + _HEADER.size > len(content):
+            if pos < len(content):
+                self.error = f"{len(content) - pos} stray bytes at offset {pos}"
+            self._done = True
+            return False
+
+        length, ctype = _HEADER.unpack_from(content, pos)
+        if not _valid_type(ctype):
+            self.error = f"Invalid chunk type {ctype!r} at offset {pos}"
+            self._done = True
+            return False
+
+        chunk = Chunk(ctype.decode('ascii'), pos, length, pos + _HEADER.size)
+        self.chunks.append(chunk)
+        self.index.setdefault(chunk.type, []).append(chunk)
+        self._pos = chunk.data_start + length + 4
+        if chunk.data_start + length > len(content):
+            self.error = f"{chunk.type} chunk at offset {pos} runs past the end of the file"
+            self._done = True
+        return True
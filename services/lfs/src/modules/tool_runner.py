@@ -0,0 +1,34 @@
+import subprocess
+import threading
+from concurrent.futures import Future
+
+
+def _run(future, args, kwargs):
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(subprocess.run(args, **kwargs))
+    except BaseException as e:
+        future.set_exception(e)
+
+
+def start_tool(args, timeout=10, **kwargs):
+    """Start an external tool in the background.
+
+    Takes the same arguments as subprocess.run. The tool starts right away
+    on its own thread rather than queueing for a pool worker, so ``timeout``
+    bounds its wall-clock time from this call. The returned future's
+    result() gives the CompletedProcess, or raises whatever subprocess.run
+    raised (TimeoutExpired, CalledProcessError, FileNotFoundError, ...).
+    """
+    future = Future()
+    kwargs['timeout'] = timeout
+    threading.Thread(target=_run, args=(future, args, kwargs), name='lfs-tool', daemon=True).start()
+    return future
+
+
+def wait_tools(*futures):
+    """Block until every started tool has exited, ignoring its outcome."""
+    for future in futures:
+        if future is not None:
+            future.exception()
@@ -0,0 +1,65 @@
+import errno
+import os
+import shutil
+import uuid
+
+UPLOAD_FOLDER = '/app/uploads'
+SHM_FOLDER = '/dev/shm/lfs-uploads'
+
+
+def _default_root():
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return SHM_FOLDER
+    return UPLOAD_FOLDER
+
+STAGE_ROOT = _default_root()
+
+
+def read_upload(file, max_size):
+    """Read an uploaded file into memory.
+
+    Werkzeug has already spooled the whole upload by the time this runs;
+    reading at most ``max_size + 1`` bytes only avoids copying an oversized
+    one into memory again. Returns the bytes, or None if the upload is
+    larger than ``max_size``.
+    """
+    file.seek(0)
+    data = file.read(max_size + 1)
+    if len(data) > max_size:
+        return None
+    return data
+
+
+def stage_upload(data, filename):
+    """Write an upload once into its own directory for the external tools.
+
+    The directory goes under tmpfs when ``/dev/shm`` is usable, falling
+    back to ``UPLOAD_FOLDER`` if tmpfs runs out of space. ``filename`` is
+    joined onto the directory as given, like the handlers always did.
+    Returns ``(temp_dir, filepath)``; remove both with ``discard_stage``.
+    """
+    roots = [STAGE_ROOT] if STAGE_ROOT == UPLOAD_FOLDER else [STAGE_ROOT, UPLOAD_FOLDER]
+    for root in roots:
+        temp_dir = os.path.join(root, str(uuid.uuid4()))
+        filepath = os.path.join(temp_dir, filename)
+        opened = False
+        try:
+            os.makedirs(temp_dir)
+            with open(filepath, 'wb') as f:
+                opened = True
+                f.write(data)
+            return temp_dir, filepath
+        except OSError as e:
+            discard_stage(temp_dir, filepath if opened else None)
+            if e.errno != errno.ENOSPC or root == roots[-1]:
+                raise
+
+
+def discard_stage(temp_dir, filepath=None):
+    # A filename with '../' lands outside temp_dir, so remove it by path too
+    if filepath is not None:
+        try:
+            os.remove(filepath)
+        except OSError:
+            pass
+    shutil.rmtree(temp_dir, ignore_errors=True)
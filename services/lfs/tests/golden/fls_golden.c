@@ -0,0 +1,21 @@
+/* fls -r -o <sector> <image>: same tsk_fs_fls call and flags as tools/fstools/fls.cpp
+ *
+ * Build against libtsk (Sleuth Kit 4.15.0 was used for the golden files):
+ *   g++ -x c++ -I<sleuthkit> -c fls_golden.c && g++ -o fls_golden fls_golden.o libtsk.a -lpthread
+ * Run: ./fls_golden <sector> <image>
+ */
+#include <tsk/libtsk.h>
+#include <stdlib.h>
+int main(int argc, char **argv) {
+    TSK_DADDR_T sector = strtoull(argv[1], NULL, 10);
+    TSK_IMG_INFO *img = tsk_img_open_sing(argv[2], TSK_IMG_TYPE_DETECT, 0);
+    if (!img) { tsk_error_print(stderr); return 1; }
+    TSK_FS_INFO *fs = tsk_fs_open_img(img, sector * img->sector_size, TSK_FS_TYPE_DETECT);
+    if (!fs) { tsk_error_print(stderr); return 1; }
+    int name_flags = TSK_FS_DIR_WALK_FLAG_ALLOC | TSK_FS_DIR_WALK_FLAG_UNALLOC | TSK_FS_DIR_WALK_FLAG_RECURSE;
+    int fls_flags = TSK_FS_FLS_DIR | TSK_FS_FLS_FILE;
+    if (tsk_fs_fls(fs, (TSK_FS_FLS_FLAG_ENUM) fls_flags, fs->root_inum, (TSK_FS_DIR_WALK_FLAG_ENUM) name_flags, NULL, 0)) {
+        tsk_error_print(stderr); return 1;
+    }
+    return 0;
+}
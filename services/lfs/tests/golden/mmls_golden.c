@@ -0,0 +1,37 @@
+/* mmls <image>: libtsk partition walk printed with the tools/vstools/mmls.cpp formats
+ *
+ * Build against libtsk (Sleuth Kit 4.15.0 was used for the golden files):
+ *   g++ -x c++ -I<sleuthkit> -c mmls_golden.c && g++ -o mmls_golden mmls_golden.o libtsk.a -lpthread
+ * Run: ./mmls_golden <image>
+ */
+#include <tsk/libtsk.h>
+#include <inttypes.h>
+static TSK_WALK_RET_ENUM part_act(TSK_VS_INFO *vs, const TSK_VS_PART_INFO *part, void *ptr) {
+    if (part->flags & TSK_VS_PART_FLAG_META)
+        tsk_printf("%.3" PRIuPNUM ":  Meta      ", part->addr);
+    else if (part->table_num == -1 && part->slot_num == -1)
+        tsk_printf("%.3" PRIuPNUM ":  -------   ", part->addr);
+    else if (part->table_num == -1 && part->slot_num != -1)
+        tsk_printf("%.3" PRIuPNUM ":  %.3" PRIu8 "       ", part->addr, part->slot_num);
+    else if (part->table_num != -1 && part->slot_num == -1)
+        tsk_printf("%.3" PRIuPNUM ":  -------   ", part->addr);
+    else
+        tsk_printf("%.3" PRIuPNUM ":  %.3d:%.3d   ", part->addr, part->table_num, part->slot_num);
+    tsk_printf("%.10" PRIuDADDR "   %.10" PRIuDADDR "   %.10" PRIuDADDR "   %s\n",
+        part->start, (TSK_DADDR_T) (part->start + part->len - 1), part->len, part->desc);
+    return TSK_WALK_CONT;
+}
+int main(int argc, char **argv) {
+    TSK_IMG_INFO *img = tsk_img_open_sing(argv[1], TSK_IMG_TYPE_DETECT, 0);
+    if (!img) { tsk_error_print(stderr); return 1; }
+    TSK_VS_INFO *vs = tsk_vs_open(img, 0, TSK_VS_TYPE_DETECT);
+    if (!vs) { tsk_error_print(stderr); return 1; }
+    tsk_printf("%s\n", tsk_vs_type_todesc(vs->vstype));
+    tsk_printf("Offset Sector: %" PRIuDADDR "\n", (TSK_DADDR_T) (vs->offset / vs->block_size));
+    tsk_printf("Units are in %d-byte sectors\n\n", vs->block_size);
+    tsk_printf("      Slot      Start        End          Length       Description\n");
+    if (tsk_vs_part_walk(vs, 0, vs->part_count - 1, TSK_VS_PART_FLAG_ALL, part_act, NULL)) {
+        tsk_error_print(stderr); return 1;
+    }
+    return 0;
+}
@@ -0,0 +1,140 @@
+import glob
+import os
+import struct
+import sys
+import zlib
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+from modules.png_chunks import PNG_SIGNATURE, PngChunks  # noqa: E402
+
+PAYLOADS = sorted(glob.glob(os.path.join(HERE, '..', '..', '..', 'receiver', 'payloads', 'lfs', 'png', '*.png')))
+
+
+def chunk(ctype, data, crc=None):
+    if crc is None:
+        crc = zlib.crc32(ctype + data)
+    return struct.pack('>I', len(data)) + ctype + data + struct.pack('>I', crc)
+
+
+def ihdr(width=2, height=2):
+    return chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+
+
+def idat(payload=b''):
+    # Raw scanlines followed by whatever the test wants inside the stream
+    return chunk(b'IDAT', zlib.compress(b'\0' + b'\0' * 6 + b'\0' + b'\0' * 6) + payload)
+
+
+IEND = chunk(b'IEND', b'')
+
+
+def legacy_lftd(content):
+    """The search the analyzer used before the chunk walker."""
+    start = content.find(b'LFTD')
+    if start <= 0:
+        return None
+    length = int.from_bytes(content[start - 4:start], 'big')
+    return content[start + 4:start + 4 + length]
+
+
+def test_payload_corpus_present():
+    assert len(PAYLOADS) == 3
+
+
+@pytest.mark.parametrize('path', PAYLOADS, ids=os.path.basename)
+def test_payload_lftd_lookup_unchanged(path):
+    with open(path, 'rb') as f:
+        content = f.read()
+    chunks = PngChunks(content)
+    found = chunks.find('LFTD')
+    assert (chunks.data(found) if found else None) == legacy_lftd(content)
+
+
+@pytest.mark.parametrize('path', PAYLOADS, ids=os.path.basename)
+def test_payload_stats(path):
+    with open(path, 'rb') as f:
+        content = f.read()
+    stats = PngChunks(content).stats()
+
+    assert [c['type'] for c in stats['chunks']][0] == 'IHDR'
+    assert stats['chunks'][-1]['type'] == 'IEND'
+    assert all(c['crc'] == 'OK' for c in stats['chunks'])
+    assert stats['crc_errors'] == 0
+    assert stats['iend_found'] is True
+    assert stats['trailing_bytes'] == 0
+    assert stats['error'] is None
+    width, height = struct.unpack('>II', content[16:24])
+    assert (stats['ihdr']['width'], stats['ihdr']['height']) == (width, height)
+    # Every byte is accounted for by the signature and the chunks
+    assert len(PNG_SIGNATURE) + sum(c['length'] + 12 for c in stats['chunks']) == len(content)
+
+
+def test_lftd_bytes_inside_idat_are_not_a_chunk():
+    content = PNG_SIGNATURE + ihdr() + idat(b'\0\0\0\x05LFTD1+1') + IEND
+    chunks = PngChunks(content)
+    assert chunks.find('LFTD') is None
+    assert [c['type'] for c in chunks.stats()['chunks']] == ['IHDR', 'IDAT', 'IEND']
+
+
+def test_lftd_chunk_after_idat_with_lftd_bytes():
+    content = PNG_SIGNATURE + ihdr() + idat(b'LFTD') + chunk(b'LFTD', b'7*7') + IEND
+    chunks = PngChunks(content)
+    found = chunks.find('LFTD')
+    assert chunks.data(found) == b'7*7'
+    assert chunks.crc_ok(found) is True
+
+
+def test_lftd_appended_after_iend_is_found():
+    content = PNG_SIGNATURE + ihdr() + idat() + IEND + chunk(b'LFTD', b'7*7')
+    chunks = PngChunks(content)
+    assert chunks.data(chunks.find('LFTD')) == b'7*7'
+    stats = chunks.stats()
+    assert stats['trailing_bytes'] == len(chunk(b'LFTD', b'7*7'))
+    assert stats['error'] is None
+
+
+def test_bad_crc_is_reported_but_chunk_still_found():
+    content = PNG_SIGNATURE + ihdr() + chunk(b'LFTD', b'1+1', crc=0) + idat() + IEND
+    chunks = PngChunks(content)
+    found = chunks.find('LFTD')
+    assert chunks.data(found) == b'1+1'
+    assert chunks.crc_ok(found) is False
+
+    stats = chunks.stats()
+    assert stats['crc_errors'] == 1
+    assert [c['crc'] for c in stats['chunks']] == ['OK', 'BAD', 'OK', 'OK']
+
+
+def test_truncated_chunk():
+    full = chunk(b'LFTD', b'1+1+1+1')
+    content = PNG_SIGNATURE + ihdr() + full[:-6]
+    chunks = PngChunks(content)
+    found = chunks.find('LFTD')
+    assert found.length == 7
+    assert chunks.data(found) == b'1+1+1'
+    assert chunks.crc_ok(found) is None
+
+    stats = chunks.stats()
+    assert stats['chunks'][-1] == {'type': 'LFTD', 'offset': 33, 'length': 7, 'crc': 'missing'}
+    assert stats['iend_found'] is False
+    assert stats['error'] == 'LFTD chunk at offset 33 runs past the end of the file'
+
+
+def test_truncated_header_and_invalid_type():
+    stray = PngChunks(PNG_SIGNATURE + ihdr() + b'\0\0\0')
+    assert stray.find('LFTD') is None
+    assert stray.stats()['error'] == '3 stray bytes at offset 33'
+
+    garbage = PngChunks(PNG_SIGNATURE + ihdr() + b'\0\0\0\0L1TD' + chunk(b'LFTD', b'1'))
+    assert garbage.find('LFTD') is None
+    assert garbage.stats()['error'] == "Invalid chunk type b'L1TD' at offset 33"
+
+
+def test_missing_signature():
+    chunks = PngChunks(b'GIF89a' + chunk(b'LFTD', b'1'))
+    assert chunks.find('LFTD') is None
+    assert chunks.stats()['error'] == 'Missing PNG signature'